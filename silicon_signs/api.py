@@ -1,161 +1,827 @@
-import os, math, tempfile, re
-import frappe, fitz  # PyMuPDF
-from svgpathtools import svg2paths2
-from xml.etree import ElementTree as ET
+import gc
+import io
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import cache
+from time import perf_counter
+
+import frappe
+from frappe.utils import cint
+
+# PyMuPDF (fitz), numpy, svgpathtools (which pulls in scipy) and ElementTree are imported inside the
+# functions that measure, so a worker that merely loads this module for its whitelisted methods
+# doesn't pay ~0.9s of imports; `python -X importtime -c "import silicon_signs.api"` shows the cost
+from silicon_signs.metrics import span, timed
+from silicon_signs.silicon_signs.doctype.perimeter_cache.perimeter_cache import (
+    file_content_hash,
+    get_cached_result,
+    make_cache_key,
+    set_cached_result,
+)
 
 # ---- knobs ----
 BEZ_TOL_PT = 0.25
 MIN_SUBPATH_LEN_PT = 0.75
+JOIN_EPS_PT = 1e-3  # gap below which consecutive segments count as one subpath
+DEDUPE_GRID_PT = 0.01  # subpaths equal on this grid are one outline drawn twice (fill + stroke, stacked
+                       # copies) and are counted once per page; 0 counts every copy
+RASTER_DPI = 300  # render resolution for the raster engine (site_config: perimeter_raster_dpi)
+RASTER_LEVEL = 0.5  # ink coverage the raster engine traces the outline at
+VISIBILITY_RULES = 2  # bump when only_visible starts dropping something new, so cached results are redone
 
-def _dist(p, q): return math.hypot(p.x - q.x, p.y - q.y)
+# points are plain (x, y) tuples from get_cdrawings(); fitz.Point indexes the same way
+def _dist(p, q): return math.hypot(p[0] - q[0], p[1] - q[1])
 
-def _cubic_len(p0, p1, p2, p3, tol=BEZ_TOL_PT, depth=0, max_depth=12):
+def _cubic_len(p0, p1, p2, p3, tol=None, depth=0, max_depth=12):
+    if tol is None:
+        tol = BEZ_TOL_PT  # read at call time so the knob can be tuned (see benchmarks)
     chord = _dist(p0, p3)
     cont  = _dist(p0, p1) + _dist(p1, p2) + _dist(p2, p3)
     if depth >= max_depth or abs(cont - chord) < tol:
         return (cont + chord) / 2.0
-    m01 = fitz.Point((p0.x+p1.x)/2, (p0.y+p1.y)/2)
-    m12 = fitz.Point((p1.x+p2.x)/2, (p1.y+p2.y)/2)
-    m23 = fitz.Point((p2.x+p3.x)/2, (p2.y+p3.y)/2)
-    m012 = fitz.Point((m01.x+m12.x)/2, (m01.y+m12.y)/2)
-    m123 = fitz.Point((m12.x+m23.x)/2, (m12.y+m23.y)/2)
-    m0123 = fitz.Point((m012.x+m123.x)/2, (m012.y+m123.y)/2)
+    m01 = ((p0[0]+p1[0])/2, (p0[1]+p1[1])/2)
+    m12 = ((p1[0]+p2[0])/2, (p1[1]+p2[1])/2)
+    m23 = ((p2[0]+p3[0])/2, (p2[1]+p3[1])/2)
+    m012 = ((m01[0]+m12[0])/2, (m01[1]+m12[1])/2)
+    m123 = ((m12[0]+m23[0])/2, (m12[1]+m23[1])/2)
+    m0123 = ((m012[0]+m123[0])/2, (m012[1]+m123[1])/2)
     return (_cubic_len(p0, m01, m012, m0123, tol, depth+1, max_depth) +
             _cubic_len(m0123, m123, m23, p3, tol, depth+1, max_depth))
 
-def _page_vector_length_points(page: fitz.Page, only_visible=False) -> float:
-    total = 0.0
-    drawings = page.get_drawings()  # list[dict]
+def _is_visible(d):
+    stroke_alpha = d.get("stroke_opacity", 1.0)
+    fill_alpha   = d.get("fill_opacity", 1.0)
+    has_stroke   = d.get("color") is not None and (stroke_alpha or 0) > 0
+    has_fill     = d.get("fill") is not None and (fill_alpha or 0) > 0
+    return has_stroke or has_fill
+
+def _hidden_layers(doc):
+    """Names of optional-content groups (Illustrator layers) switched off in the default view."""
+    try:
+        ocgs = doc.get_ocgs()
+    except Exception:
+        return frozenset()
+    shown = {o["name"] for o in ocgs.values() if o.get("on")}
+    return frozenset(o["name"] for o in ocgs.values() if not o.get("on") and o["name"] not in shown)
+
+def _drawing_area(page):
+    """The page's visible (crop) area in the coordinates get_cdrawings() reports: unrotated, with the
+    cropbox's top-left corner at 0,0. ``page.rect`` is the rotated area, wrong on landscape artboards."""
+    return page.rect * page.derotation_matrix
+
+def _visible_filter(rect, hidden=frozenset()):
+    """Predicate for only_visible, cheapest test first: on the page's visible (crop) area ``rect``, not
+    on one of the ``hidden`` layers, and actually painted. Culled drawings are never walked."""
+    x0, y0, x1, y1 = rect  # from _drawing_area(), in the same coordinates as each drawing's rect
+
+    def visible(d):
+        r = d.get("rect")
+        # off-canvas scrap and bleed; a drawing that crosses the edge is kept and measured in full
+        if r and (r[2] < x0 or r[0] > x1 or r[3] < y0 or r[1] > y1):
+            return False
+        if hidden and d.get("layer") in hidden:
+            return False
+        return _is_visible(d)
+    return visible
+
+def _page_drawings(page, only_visible=False):
+    # get_cdrawings() is get_drawings() without the Point/Rect/Quad wrappers: same geometry as plain
+    # tuples, a fraction of the memory on pages with hundreds of thousands of paths
+    with span("get_drawings"):
+        drawings = page.get_cdrawings()
+    return _drain(drawings, _visible_filter(_drawing_area(page), _hidden_layers(page.parent)) if only_visible else None)
+
+def _drain(drawings, keep=None):
+    # hand out drawings in order while dropping the list's reference, so each dict is freed once measured
+    drawings.reverse()
+    while drawings:
+        d = drawings.pop()
+        if keep is not None and not keep(d):
+            continue
+        yield d
+
+def _page_vector_length_points(page, only_visible=False, group=None):
+    drawings = _page_drawings(page, only_visible)
+    with span("integrate"):
+        return _drawings_length_points(drawings, group)
+
+DUPLICATE = "duplicate"  # group key that duplicate copies are credited to, so they can be reported
+
+def _drawings_length_points(drawings, group=None):
+    """Total length in points, or {group(d): length} when a grouping function is given; the length of
+    duplicate subpaths left out of the total is then under DUPLICATE. Copies are only looked for within
+    a group: the same outline on two layers (faces and returns) is counted on each."""
+    if group is None:
+        seen = set() if DEDUPE_GRID_PT else None
+        return sum(_drawing_length_points(d, seen)[0] for d in drawings)
+    out, seen = {}, {}
     for d in drawings:
-        if only_visible:
-            stroke_alpha = d.get("stroke_opacity", 1.0)
-            fill_alpha   = d.get("fill_opacity", 1.0)
-            has_stroke   = d.get("color") is not None and stroke_alpha > 0
-            has_fill     = d.get("fill") is not None and fill_alpha > 0
-            if not (has_stroke or has_fill):
-                continue
-        items = d.get("items") or []
-        cp = sp = None
-        sub_len = 0.0
-        for it in items:
-            if not it: continue
-            op = it[0]
-            pts = it[1] if len(it) > 1 else []
-            try:
-                if op == "m":
-                    if sub_len >= MIN_SUBPATH_LEN_PT: total += sub_len
+        key = group(d)
+        length, duplicate = _drawing_length_points(d, seen.setdefault(key, set()) if DEDUPE_GRID_PT else None)
+        if length:
+            out[key] = out.get(key, 0.0) + length
+        if duplicate:
+            out[DUPLICATE] = out.get(DUPLICATE, 0.0) + duplicate
+    return out
+
+def _quantized(op, pts, k):
+    return (op, *[round(v * k) for p in pts for v in (p[0], p[1])])
+
+def _tally(acc, length, seen, key):
+    # acc is [counted, duplicate]; without ``seen`` nothing is a duplicate
+    if length < MIN_SUBPATH_LEN_PT:
+        return
+    if seen is not None:
+        fp = hash(key)
+        if fp in seen:
+            acc[1] += length
+            return
+        seen.add(fp)
+    acc[0] += length
+
+def _drawing_length_points(d, seen=None):
+    """(length, duplicate length) in points. ``seen`` holds fingerprints (segments quantized to
+    DEDUPE_GRID_PT) of the subpaths already counted on the page, or in the drawing's group when grouping;
+    a subpath matching one is a duplicate."""
+    # items are ("l", p1, p2), ("c", p1, p2, p3, p4), ("re", (x0, y0, x1, y1), orient), ("qu", (ul, ur, ll, lr));
+    # a subpath ends wherever the next segment does not start at the current point
+    acc = [0.0, 0.0]
+    k = 1.0 / DEDUPE_GRID_PT if seen is not None else 0.0
+    cp = sp = None
+    sub_len = 0.0
+    sig = []
+    for it in d.get("items") or []:
+        if not it:
+            continue
+        op, pts = it[0], it[1:]
+        try:
+            if op in ("l", "c"):
+                if cp is None or _dist(cp, pts[0]) > JOIN_EPS_PT:
+                    _tally(acc, sub_len, seen, tuple(sig))
                     sub_len = 0.0
-                    cp = pts[0] if pts else None; sp = cp
-                elif op == "l" and cp is not None and pts:
-                    p1 = pts[0]; sub_len += _dist(cp, p1); cp = p1
-                elif op == "c" and cp is not None and len(pts) >= 3:
-                    sub_len += _cubic_len(cp, pts[0], pts[1], pts[2]); cp = pts[2]
-                elif op == "h" and cp is not None and sp is not None:
-                    sub_len += _dist(cp, sp); cp = sp
-                elif op == "re" and pts:
-                    r = pts[0]; sub_len += 2.0 * (abs(r.width) + abs(r.height))
-            except Exception:
-                continue
-        if sub_len >= MIN_SUBPATH_LEN_PT: total += sub_len
-    return total
+                    sig = []
+                    sp = pts[0]
+                if op == "l":
+                    sub_len += _dist(pts[0], pts[1])
+                    cp = pts[1]
+                else:
+                    sub_len += _cubic_len(pts[0], pts[1], pts[2], pts[3])
+                    cp = pts[3]
+                if seen is not None:
+                    sig.append(_quantized(op, pts, k))
+            elif op == "re":
+                r = pts[0]
+                closed = 2.0 * (abs(r[2] - r[0]) + abs(r[3] - r[1]))
+                _tally(acc, closed, seen, ("re", round(min(r[0], r[2]) * k), round(min(r[1], r[3]) * k),
+                                           round(max(r[0], r[2]) * k), round(max(r[1], r[3]) * k)))
+            elif op == "qu":
+                ul, ur, ll, lr = pts[0]
+                closed = _dist(ul, ur) + _dist(ur, lr) + _dist(lr, ll) + _dist(ll, ul)
+                _tally(acc, closed, seen, _quantized("qu", pts[0], k))
+        except Exception:
+            continue
+    if d.get("closePath") and cp is not None and sp is not None:
+        sub_len += _dist(cp, sp)
+        if seen is not None:
+            # written out as a segment, so a copy that closes with an explicit line still matches
+            closing = _quantized("l", (cp, sp), k)
+            if closing[1:3] != closing[3:5]:
+                sig.append(closing)
+    _tally(acc, sub_len, seen, tuple(sig))
+    return acc[0], acc[1]
+
+def _page_vector_length_points_np(page, only_visible=False, group=None):
+    from silicon_signs.perimeter_numpy import drawings_length_points
+    drawings = _page_drawings(page, only_visible)
+    with span("integrate"):
+        return drawings_length_points(drawings, MIN_SUBPATH_LEN_PT, JOIN_EPS_PT, group=group,
+                                      dedupe_grid_pt=DEDUPE_GRID_PT, duplicate_key=DUPLICATE)
+
+# "python" is the recursive reference walker; "numpy" batches a page's segments (see perimeter_numpy).
+# Both return a float, or {group key: length} when passed group=_layer_color (see breakdown below)
+ENGINES = {"python": _page_vector_length_points, "numpy": _page_vector_length_points_np}
+# traces the rendered page instead (see perimeter_raster); also the last resort for every other engine
+RASTER = "raster"
+
+# --- flattened geometry sidecar (see geometry_sidecar) ---
+def _packed_page_length_points(packed, engine, only_visible=False, group=None, hidden=frozenset(), drawings=None):
+    """A page measured from its packed geometry: the python engine walks it as drawings again, the
+    numpy engine works on the arrays. ``drawings`` skips the unpacking when the caller still holds them."""
+    keep = _visible_filter(packed.page_rect, hidden) if only_visible else None
+    with span("integrate"):
+        if engine == "numpy":
+            from silicon_signs.perimeter_numpy import packed_length_points
+            return packed_length_points(packed, MIN_SUBPATH_LEN_PT, JOIN_EPS_PT, keep, group, DEDUPE_GRID_PT,
+                                        DUPLICATE)
+        if drawings is None:
+            drawings = packed.drawings()
+        return _drawings_length_points(_drain(drawings, keep), group)
+
+def _pack_and_measure(page, engine, only_visible=False, group=None):
+    """(length, PackedPage): the page measured in the same pass that packs it for the sidecar."""
+    from silicon_signs.geometry_sidecar import pack_page
+    with span("get_drawings"):
+        drawings = page.get_cdrawings()
+    with span("pack"):
+        packed = pack_page(drawings, _drawing_area(page))
+    if engine == "numpy":
+        drawings = None  # measured from the arrays, so the dicts can go now
+    hidden = _hidden_layers(page.parent) if only_visible else frozenset()
+    return _packed_page_length_points(packed, engine, only_visible, group, hidden, drawings), packed
+
+def _sidecar_path(content_hash):
+    if not content_hash or not cint(frappe.conf.get("perimeter_geometry_sidecar", 1)):
+        return None
+    from silicon_signs.geometry_sidecar import sidecar_path
+    return sidecar_path(content_hash)
+
+def _measure_sidecar(path, content_hash, ov, engine, progress=None, max_rss_mb=0, breakdown=False):
+    """Page lengths from a saved sidecar, or None if it can't be used (it is dropped and rebuilt)."""
+    from silicon_signs.geometry_sidecar import Sidecar, remove_sidecars
+    group = _group(breakdown)
+    try:
+        with span("sidecar_open"), Sidecar(path, content_hash) as sc:
+            page_pts = []
+            for i in range(sc.page_count):
+                _check_memory(max_rss_mb)
+                with span("sidecar_load"):
+                    packed = sc.page(i)
+                page_pts.append(_packed_page_length_points(packed, engine, ov, group, sc.hidden_layers))
+                del packed
+                if progress:
+                    progress(i + 1, sc.page_count)
+        return page_pts
+    except MemoryError:
+        raise
+    except Exception as e:
+        frappe.log_error(f"Geometry sidecar unusable, extracting again: {e}", "AI Perimeter")
+        remove_sidecars([content_hash])
+        return None
+
+# --- per layer / colour breakdown ---
+def _color_hex(c):
+    if not c:
+        return None
+    if len(c) == 1:
+        c = (c[0],) * 3
+    elif len(c) == 4:
+        c = tuple((1 - v) * (1 - c[3]) for v in c[:3])  # naive CMYK
+    return "#" + "".join(f"{round(max(0.0, min(1.0, v)) * 255):02x}" for v in c[:3])
+
+def _layer_color(d):
+    """Group key for the breakdown: (layer, "stroke #rrggbb" or "fill #rrggbb").
+
+    Stroked paths are keyed by stroke colour (returns and trim cap are usually told apart by it),
+    fill-only paths by fill colour.
+    """
+    stroked = d.get("color") is not None and d.get("type") != "f"
+    color = _color_hex(d.get("color") if stroked else d.get("fill"))
+    return d.get("layer") or "", f"{'stroke' if stroked else 'fill'} {color}" if color else "none"
+
+def _whole_page(d):
+    return None
+
+def _group(breakdown):
+    # measured pages are always grouped, so the duplicate length comes back next to the counted one
+    return _layer_color if breakdown else _whole_page
+
+def _breakdown(groups):
+    """{(layer, colour): points} -> compact per layer / per colour / per pair lengths in inches."""
+    layers, colors = {}, {}
+    for (layer, color), pts in groups.items():
+        layers[layer] = layers.get(layer, 0.0) + pts
+        colors[color] = colors.get(color, 0.0) + pts
+
+    def as_in(d):
+        return {k: round(v / 72.0, 3) for k, v in sorted(d.items(), key=lambda kv: -kv[1])}
+
+    return {
+        "layers": as_in(layers),
+        "colors": as_in(colors),
+        "groups": [{"layer": layer, "color": color, "inches": round(pts / 72.0, 3), "lf": round(pts / 864.0, 3)}
+                   for (layer, color), pts in sorted(groups.items(), key=lambda kv: -kv[1])],
+    }
 
 # --- SVG fallback helpers ---
 _UNIT_TO_IN = {'':1/96,'px':1/96,'in':1,'mm':1/25.4,'cm':1/2.54,'pt':1/72,'pc':1/6}
 def _len_in_in(s):
-    if not s: return None
+    if not s:
+        return None
     m = re.match(r'^\s*([+-]?\d+(?:\.\d+)?)\s*([a-z%]*)\s*$', s, re.I)
-    if not m: return None
+    if not m:
+        return None
     val, unit = float(m.group(1)), (m.group(2) or '').lower()
     return val * _UNIT_TO_IN.get(unit, 1/96)
 
-def _svg_inches_per_userunit(svg_path, page_w_pt=None, page_h_pt=None):
-    root = ET.parse(svg_path).getroot()
-    vb = root.get('viewBox') or root.get('viewbox')
+def _svg_inches_per_userunit(vb, width=None, height=None, page_w_pt=None, page_h_pt=None):
     if vb:
         parts = [p for p in re.split(r'[, \s]+', vb.strip()) if p]
         if len(parts) == 4:
             _, _, vbw, vbh = map(float, parts)
-            w_in = _len_in_in(root.get('width'))
-            h_in = _len_in_in(root.get('height'))
-            if w_in and vbw: return w_in / vbw
-            if h_in and vbh: return h_in / vbh
-            # use PDF page size if provided (points → inches)
-            if page_w_pt and vbw: return (page_w_pt/72.0) / vbw
-            if page_h_pt and vbh: return (page_h_pt/72.0) / vbh
+            # MuPDF writes the page size in points as unitless width/height, so the PDF page size wins
+            if page_w_pt and vbw:
+                return (page_w_pt/72.0) / vbw
+            if page_h_pt and vbh:
+                return (page_h_pt/72.0) / vbh
+            w_in = _len_in_in(width)
+            h_in = _len_in_in(height)
+            if w_in and vbw:
+                return w_in / vbw
+            if h_in and vbh:
+                return h_in / vbh
     return 1/96  # last resort
 
-@frappe.whitelist()
-def calculate_perimeter(file_url: str, only_visible: int = 0):
+@cache
+def _svg_shapes():
+    from svgpathtools.svg_to_paths import (
+        ellipse2pathd,
+        line2pathd,
+        path2pathd,
+        polygon2pathd,
+        polyline2pathd,
+        rect2pathd,
+    )
+    return {"path": path2pathd, "rect": rect2pathd, "circle": ellipse2pathd, "ellipse": ellipse2pathd,
+            "line": line2pathd, "polyline": polyline2pathd, "polygon": polygon2pathd}
+
+_SVG_NOT_RENDERED = {"defs", "clipPath", "mask", "pattern", "symbol", "marker"}
+_XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+def _svg_path_length(path, m):
+    # lengths only scale under a similarity transform; anything else (skew, non-uniform scale) is applied
+    a, b, c, d = m[0, 0], m[1, 0], m[0, 1], m[1, 1]
+    if abs(a*a + b*b - c*c - d*d) < 1e-9 and abs(a*c + b*d) < 1e-9:
+        return math.sqrt(a*a + b*b) * path.length()
+    from svgpathtools.path import transform as svg_transform
+    return svg_transform(path, m).length()
+
+def _svg_length_user_units(svg_str):
+    """Single streaming pass over an SVG string: (total length in user units, viewBox, width, height).
+
+    Shapes under defs/clipPath/mask/... are only counted through <use>; transforms are honoured, and
+    glyph lengths are memoised per (glyph, linear transform) since text reuses the same few outlines.
+    """
+    from xml.etree import ElementTree as ET
+
+    import numpy as np
+    from svgpathtools import parse_path
+    from svgpathtools.parser import parse_transform
+
+    shapes = _svg_shapes()
+    root_attrs = None
+    stack = [np.identity(3)]
+    hidden = 0
+    defs, uses, use_lengths = {}, [], {}
+    total = 0.0
+    for event, el in ET.iterparse(io.StringIO(svg_str), events=("start", "end")):
+        tag = el.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            if root_attrs is None:
+                root_attrs = dict(el.attrib)
+            m = stack[-1]
+            if el.get("transform"):
+                m = m @ parse_transform(el.get("transform"))
+            if tag == "use" and (el.get("x") or el.get("y")):
+                m = m @ parse_transform(f"translate({el.get('x') or 0},{el.get('y') or 0})")
+            stack.append(m)
+            if tag in _SVG_NOT_RENDERED:
+                hidden += 1
+            continue
+
+        m = stack.pop()
+        if tag in _SVG_NOT_RENDERED:
+            hidden -= 1
+        elif tag in shapes:
+            try:
+                path = parse_path(shapes[tag](el.attrib))
+            except Exception:
+                path = None
+            if path is not None and len(path):
+                if el.get("id"):
+                    # referenced shapes keep their own transform; the <use> supplies the rest
+                    own = parse_transform(el.get("transform")) if el.get("transform") else np.identity(3)
+                    defs[el.get("id")] = (path, own)
+                if not hidden:
+                    total += _svg_path_length(path, m)
+        elif tag == "use" and not hidden:
+            href = el.get(_XLINK_HREF) or el.get("href") or ""
+            uses.append((href.lstrip("#"), m))
+        el.clear()
+
+    for ref, m in uses:
+        if ref not in defs:
+            continue
+        path, own = defs[ref]
+        full = m @ own
+        key = (ref, *np.round(full[:2, :2].ravel(), 6))
+        if key not in use_lengths:
+            use_lengths[key] = _svg_path_length(path, full)
+        total += use_lengths[key]
+
+    root_attrs = root_attrs or {}
+    return total, root_attrs.get("viewBox") or root_attrs.get("viewbox"), root_attrs.get("width"), root_attrs.get("height")
+
+def _svg_page_length_inches(page):
+    svg_str = page.get_svg_image(text_as_path=True)
+    total_user, vb, width, height = _svg_length_user_units(svg_str)
+    return total_user * _svg_inches_per_userunit(vb, width, height, page.rect.width, page.rect.height)
+
+# --- raster helpers ---
+DEFAULT_RASTER_MAX_MPX = 64  # site_config: perimeter_raster_max_mpx; larger renders are made at a lower dpi
+DEFAULT_RASTER_TIMEOUT_S = 120  # site_config: perimeter_raster_timeout, for all pages of a file
+
+def _raster_dpi():
+    return cint(frappe.conf.get("perimeter_raster_dpi")) or RASTER_DPI
+
+def _content_area(page):
+    """Where the page paints anything (images, paths, text), padded a little; the whole page if blank.
+
+    get_bboxlog() reports unrotated coordinates like get_cdrawings(); the area is returned rotated,
+    in ``page.rect`` coordinates, which is what get_pixmap's clip expects.
+    """
+    import fitz  # PyMuPDF
+    area = fitz.Rect()
+    for _, bbox in page.get_bboxlog():
+        area |= bbox
+    if area.is_empty:
+        return page.rect
+    area = fitz.Rect(area.x0 - 2, area.y0 - 2, area.x1 + 2, area.y1 + 2) * page.rotation_matrix & page.rect
+    return page.rect if area.is_empty else area
+
+def _raster_page_length_inches(page, dpi, max_px, deadline=None):
+    """(traced length in inches, dpi used): the painted area rendered grey at ``dpi``, or lower if
+    that would take more than ``max_px`` pixels."""
+    import fitz  # PyMuPDF
+    import numpy as np
+
+    from silicon_signs.perimeter_raster import contour_length_px
+
+    clip = _content_area(page)
+    area_in2 = clip.width * clip.height / 5184.0
+    if area_in2 * dpi * dpi > max_px:
+        dpi = math.sqrt(max_px / area_in2)
+    zoom = dpi / 72.0
+    with span("raster_render"):
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    with span("raster_trace"):
+        return contour_length_px(gray, RASTER_LEVEL, deadline=deadline) / dpi, dpi
+
+def _as_bool(v): return str(v or "0").lower() in ("1","true","yes")
+
+def _resolve_file_path(file_url):
     if not file_url:
         frappe.throw("Missing file URL.")
-    # resolve file path
     rel = file_url.lstrip("/")
     src = None
     for base in ("public", "private"):
         cand = os.path.join(frappe.get_site_path(base), rel)
-        if os.path.exists(cand): src = cand; break
+        if os.path.exists(cand):
+            src = cand
+            break
         if rel.startswith("files/"):
             cand = os.path.join(frappe.get_site_path(base), rel)
-            if os.path.exists(cand): src = cand; break
+            if os.path.exists(cand):
+                src = cand
+                break
     if not src:
         cand = os.path.join(frappe.get_site_path("public"), rel.replace("/files/", "files/"))
-        if os.path.exists(cand): src = cand
+        if os.path.exists(cand):
+            src = cand
     if not src or not os.path.exists(src):
         frappe.throw(f"File not found: {file_url}")
+    return src
+
+def _engine(engine):
+    engine = engine or frappe.conf.get("perimeter_engine") or "python"
+    if engine not in ENGINES and engine != RASTER:
+        frappe.throw(f"Unknown perimeter engine: {engine}")
+    return engine
+
+@frappe.whitelist()
+def calculate_perimeter(file_url: str, only_visible: int = 0, use_cache: int = 1, engine: str | None = None,
+                        workers: int | None = None, breakdown: int = 0):
+    """Perimeter of an AI/PDF attachment; with breakdown=1 also split by layer and stroke/fill colour."""
+    with timed("calculate_perimeter"):
+        src = _resolve_file_path(file_url)
+        return _calculate(src, file_url, _as_bool(only_visible), _engine(engine), _as_bool(use_cache),
+                          workers=_workers(workers), breakdown=_as_bool(breakdown))
+
+def _cache_knobs(ov, engine, breakdown=False):
+    # every setting that changes the measured result must be part of the cache key
+    knobs = {"only_visible": int(ov), "bez_tol_pt": BEZ_TOL_PT, "min_subpath_len_pt": MIN_SUBPATH_LEN_PT,
+             "engine": engine}
+    if ov:
+        knobs["visibility_rules"] = VISIBILITY_RULES
+    if DEDUPE_GRID_PT:
+        knobs["dedupe_grid_pt"] = DEDUPE_GRID_PT
+    if breakdown:
+        knobs["breakdown"] = 1
+    # any engine can end up tracing the rendered pages (see _measure_file)
+    knobs["raster_dpi"] = _raster_dpi()
+    knobs["raster_level"] = RASTER_LEVEL
+    return knobs
+
+def _calculate(src, file_url, ov, engine, use_cache=True, progress=None, workers=1, breakdown=False):
+    if not use_cache:
+        return _measure_file(src, ov, file_url, engine, progress, workers, breakdown)
+
+    # repeat measurements of the same artwork with the same knobs come from Perimeter Cache
+    content_hash = file_content_hash(src)
+    knobs = _cache_knobs(ov, engine, breakdown)
+    cache_key = make_cache_key(content_hash, knobs)
+    with span("cache_lookup"):
+        cached = get_cached_result(cache_key)
+    if cached:
+        return {**cached, "cache": "hit"}
+
+    result = _measure_file(src, ov, file_url, engine, progress, workers, breakdown, content_hash)
+    set_cached_result(cache_key, content_hash, knobs, result)
+    return {**result, "cache": "miss"}
+
+# --- background measurement ---
+JOB_STATUS_TTL = 3600
+
+def _job_key(job_id): return f"perimeter_job:{job_id}"
+
+def _set_job_status(job_id, user, **status):
+    status["job_id"] = job_id
+    status["user"] = user  # only the user who queued the job (or a System Manager) may read it back
+    frappe.cache().set_value(_job_key(job_id), status, expires_in_sec=JOB_STATUS_TTL)
+    frappe.publish_realtime("perimeter_progress", status, user=user)
+
+@frappe.whitelist()
+def enqueue_perimeter(file_url: str, only_visible: int = 0, use_cache: int = 1, engine: str | None = None,
+                      workers: int | None = None, breakdown: int = 0):
+    """Measure in a background job; returns a job id to poll (or the cached result straight away)."""
+    src = _resolve_file_path(file_url)
+    ov, engine, breakdown = _as_bool(only_visible), _engine(engine), _as_bool(breakdown)
+    if _as_bool(use_cache):
+        cached = get_cached_result(make_cache_key(file_content_hash(src), _cache_knobs(ov, engine, breakdown)))
+        if cached:
+            return {"status": "done", "result": {**cached, "cache": "hit"}}
+
+    job_id = frappe.generate_hash(length=12)
+    _set_job_status(job_id, frappe.session.user, status="queued")
+    frappe.enqueue(
+        "silicon_signs.api._perimeter_job",
+        queue="long",
+        timeout=1500,
+        token=job_id,
+        file_url=file_url,
+        src=src,
+        ov=ov,
+        engine=engine,
+        use_cache=_as_bool(use_cache),
+        workers=_workers(workers),
+        breakdown=breakdown,
+        user=frappe.session.user,
+    )
+    return {"status": "queued", "job_id": job_id}
+
+def _perimeter_job(token, file_url, src, ov, engine, use_cache, workers, user, breakdown=False):
+    # `token` rather than `job_id`: frappe.enqueue consumes a job_id kwarg itself
+    def progress(done, total):
+        _set_job_status(token, user, status="running", page=done, pages=total)
+    try:
+        with timed("perimeter_job"):
+            result = _calculate(src, file_url, ov, engine, use_cache, progress, workers, breakdown)
+    except Exception as e:
+        _set_job_status(token, user, status="failed", error=str(e))
+        return
+    _set_job_status(token, user, status="done", result=result)
+
+@frappe.whitelist()
+def get_perimeter_job(job_id: str):
+    status = frappe.cache().get_value(_job_key(job_id))
+    if not status or (status.get("user") != frappe.session.user and "System Manager" not in frappe.get_roles()):
+        return {"job_id": job_id, "status": "unknown"}
+    return status
 
+# --- memory ceiling ---
+DEFAULT_MAX_RSS_MB = 1536  # site_config: perimeter_max_rss_mb, 0 disables the check
+
+def _max_rss_mb():
+    return cint(frappe.conf.get("perimeter_max_rss_mb", DEFAULT_MAX_RSS_MB))
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError):
+        import resource  # no /proc: peak rather than current RSS, which errs on the safe side
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _check_memory(max_rss_mb):
+    if not max_rss_mb or _rss_mb() < max_rss_mb:
+        return
+    import fitz  # PyMuPDF
+    # MuPDF's object store (fonts, images, parsed objects) is the usual culprit; drop it and look again
+    fitz.TOOLS.store_shrink(100)
+    gc.collect()
+    if _rss_mb() >= max_rss_mb:
+        raise MemoryError(f"Measurement stopped: worker memory passed the {max_rss_mb} MB ceiling (perimeter_max_rss_mb).")
+
+def _pages(doc, max_rss_mb, start=0, stop=None):
+    """Pages one at a time, checking the memory ceiling before each, so only one page is alive at once."""
+    for i in range(start, doc.page_count if stop is None else stop):
+        _check_memory(max_rss_mb)
+        page = doc.load_page(i)
+        yield page
+        del page
+
+def _measure_page_range(src, start, stop, ov, engine, max_rss_mb=0, breakdown=False, record=False):
+    # runs in a pool process: each worker opens its own handle, fitz documents can't be shared.
+    # With record, returns (length, PackedPage) per page and the parent writes the sidecar
+    import fitz  # PyMuPDF
+    page_length_points = ENGINES[engine]
+    group = _group(breakdown)
+    with fitz.open(src) as doc:
+        if record:
+            return [_pack_and_measure(page, engine, ov, group) for page in _pages(doc, max_rss_mb, start, stop)]
+        return [page_length_points(page, only_visible=ov, group=group)
+                for page in _pages(doc, max_rss_mb, start, stop)]
+
+def _measure_pages_parallel(src, n_pages, ov, engine, workers, progress=None, max_rss_mb=0, breakdown=False,
+                            writer=None):
+    # twice as many ranges as workers so one dense sheet doesn't leave the other workers idle
+    step = max(1, -(-n_pages // (workers * 2)))
+    ranges = [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+    page_pts = [0.0] * n_pages
+    done = 0
+    record = writer is not None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_measure_page_range, src, a, b, ov, engine, max_rss_mb, breakdown, record): (a, b)
+                   for a, b in ranges}
+        for fut in as_completed(futures):
+            a, b = futures[fut]
+            if record:
+                for i, (pts, packed) in enumerate(fut.result(), a):
+                    page_pts[i] = pts
+                    writer.add(i, packed)
+            else:
+                page_pts[a:b] = fut.result()
+            done += b - a
+            if progress:
+                progress(done, n_pages)
+    return page_pts
+
+def _workers(workers):
+    limit = cint(frappe.conf.get("perimeter_max_workers")) or os.cpu_count() or 1
+    return max(1, min(cint(workers or frappe.conf.get("perimeter_workers") or 1), limit))
+
+def _measure_document(src, ov, engine, progress=None, workers=1, max_rss_mb=0, breakdown=False, sidecar=None,
+                      content_hash=None):
+    """Page lengths extracted with PyMuPDF; with a ``sidecar`` path the packed geometry is saved there too."""
+    import fitz  # PyMuPDF
     # open via PyMuPDF (AI/PDF)
     try:
-        doc = fitz.open(src)
+        with span("open"):
+            doc = fitz.open(src)
     except Exception as e:
         frappe.log_error(f"PyMuPDF open failed: {e}", "AI Perimeter")
         frappe.throw("Cannot open file with PDF engine. Ensure AI is PDF-compatible or export as PDF.")
 
-    total_pts = 0.0
-    ov = str(only_visible or "0").lower() in ("1","true","yes")
+    # pages are loaded, measured and released one by one (see _pages), so memory tracks the
+    # densest page rather than the whole file
+    writer = None
     try:
-        for page in doc:
-            total_pts += _page_vector_length_points(page, only_visible=ov)
+        n_pages = doc.page_count
+        if sidecar:
+            from silicon_signs.geometry_sidecar import SidecarWriter
+            try:
+                writer = SidecarWriter(sidecar, content_hash)
+            except OSError as e:
+                frappe.log_error(f"Cannot write geometry sidecar: {e}", "AI Perimeter")
+        workers = min(workers, n_pages)
+        if workers > 1:
+            # spans don't cross the process pool, so the parallel walk is timed as a whole
+            with span("pages_parallel"):
+                page_pts = _measure_pages_parallel(src, n_pages, ov, engine, workers, progress, max_rss_mb,
+                                                   breakdown, writer)
+        else:
+            page_length_points = ENGINES[engine]
+            group = _group(breakdown)
+            page_pts = []
+            for i, page in enumerate(_pages(doc, max_rss_mb)):
+                if writer is None:
+                    page_pts.append(page_length_points(page, only_visible=ov, group=group))
+                else:
+                    pts, packed = _pack_and_measure(page, engine, ov, group)
+                    with span("sidecar_write"):
+                        writer.add(i, packed)
+                    page_pts.append(pts)
+                    del packed
+                if progress:
+                    progress(len(page_pts), n_pages)
+        if writer is not None:
+            writer.close(n_pages, _hidden_layers(doc))
+            writer = None
     finally:
-        # keep page size for SVG ipu if we need it
-        sizes_pt = [(p.rect.width, p.rect.height) for p in doc]
+        if writer is not None:
+            writer.abort()
         doc.close()
+    return page_pts
+
+def _measure_file(src, ov, file_url, engine="python", progress=None, workers=1, breakdown=False,
+                  content_hash=None):
+    max_rss_mb = _max_rss_mb()
+    if engine != RASTER:
+        result = (_measure_vectors(src, ov, engine, progress, workers, breakdown, content_hash, max_rss_mb)
+                  or _measure_svg(src, max_rss_mb))
+        if result:
+            return result
+
+    # ---- Fallback B: trace the rendered pages (artwork that is only raster images) ----
+    result = _measure_raster(src, max_rss_mb, progress)
+    if result:
+        return result
+
+    # Nothing measurable
+    frappe.throw("Measured length is zero. The file has no vector outlines and nothing could be traced from its rendered pages. Try exporting outlines from Illustrator or send a PDF-compatible AI.")
+
+def _measure_vectors(src, ov, engine, progress=None, workers=1, breakdown=False, content_hash=None, max_rss_mb=0):
+    # with a content hash, the first measurement saves the page geometry and later ones (other knobs,
+    # breakdown) read it back instead of extracting it again; no hash (use_cache=0) extracts afresh
+    sidecar = _sidecar_path(content_hash)
+    page_pts, geometry = None, "sidecar"
+    try:
+        if sidecar and os.path.exists(sidecar):
+            page_pts = _measure_sidecar(sidecar, content_hash, ov, engine, progress, max_rss_mb, breakdown)
+        if page_pts is None:
+            geometry = "extracted"
+            page_pts = _measure_document(src, ov, engine, progress, workers, max_rss_mb, breakdown, sidecar,
+                                         content_hash)
+    except MemoryError as e:
+        frappe.throw(str(e))
+
+    # each page came back as {group: points} (one group without breakdown) plus the duplicates left
+    # out of it; fold pages together
+    groups, duplicate_pts = {}, 0.0
+    for i, page_groups in enumerate(page_pts):
+        duplicate_pts += page_groups.pop(DUPLICATE, 0.0)
+        for key, pts in page_groups.items():
+            groups[key] = groups.get(key, 0.0) + pts
+        page_pts[i] = sum(page_groups.values())
+    total_pts = sum(page_pts)
 
     # Primary result
     if total_pts > 0:
         per_in = round(total_pts / 72.0, 3)
         per_lf = round(per_in / 12.0, 3)
-        frappe.log_error(f"AI/PDF perimeter | file={file_url} | pts={total_pts:.3f} | in={per_in} | LF={per_lf}", "AI Perimeter")
-        return {"perimeter_inches": per_in, "perimeter_lf": per_lf, "source": "drawings"}
+        result = {"perimeter_inches": per_in, "perimeter_lf": per_lf, "source": "drawings", "engine": engine,
+                  "geometry": geometry, "page_lengths_in": [round(p / 72.0, 3) for p in page_pts],
+                  "duplicate_inches": round(duplicate_pts / 72.0, 3)}
+        if breakdown:
+            result["breakdown"] = _breakdown(groups)
+        return result
 
-    # ---- Fallback A: full-page SVG render (includes text as paths) ----
+def _measure_svg(src, max_rss_mb=0):
+    # ---- Fallback A: full-page SVG render (includes text as paths), measured in memory ----
+    import fitz  # PyMuPDF
     try:
-        doc = fitz.open(src)
-        page = doc[0]  # assume first page; sum more if needed
-        svg_str = page.get_svg_image(text_as_path=True)
-        page_w_pt, page_h_pt = page.rect.width, page.rect.height
-        doc.close()
-
-        # dump to temp, parse with svgpathtools
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".svg", delete=False, encoding="utf-8") as tmp:
-            tmp.write(svg_str)
-            tmp_path = tmp.name
-
-        paths, _, _ = svg2paths2(tmp_path)
-        os.unlink(tmp_path)
-        total_user = sum(p.length() for p in paths)
-        ipu = _svg_inches_per_userunit(tmp_path, page_w_pt=page_w_pt, page_h_pt=page_h_pt)
-        per_in = round(total_user * ipu, 3)
+        with span("svg_fallback"), fitz.open(src) as doc:
+            page_in = [_svg_page_length_inches(page) for page in _pages(doc, max_rss_mb)]
+        per_in = round(sum(page_in), 3)
         per_lf = round(per_in / 12.0, 3)
 
         if per_in > 0:
-            frappe.log_error(
-                f"SVG fallback perimeter | file={file_url} | user_sum={total_user:.3f} | ipu={ipu:.6f} "
-                f"| in={per_in} | LF={per_lf} | page_pt=({page_w_pt:.3f},{page_h_pt:.3f})",
-                "AI Perimeter"
-            )
-            return {"perimeter_inches": per_in, "perimeter_lf": per_lf, "source": "svg_fallback"}
+            return {"perimeter_inches": per_in, "perimeter_lf": per_lf, "source": "svg_fallback",
+                    "page_lengths_in": [round(p, 3) for p in page_in]}
+    except MemoryError as e:
+        frappe.throw(str(e))
     except Exception as e:
         frappe.log_error(f"SVG fallback failed: {e}", "AI Perimeter")
 
-    # Nothing measurable
-    frappe.throw("Measured length is zero. The file may contain only raster images or non-vector content (or content hidden in unsupported constructs). Try exporting outlines from Illustrator or send a PDF-compatible AI.")
+def _measure_raster(src, max_rss_mb=0, progress=None):
+    import fitz  # PyMuPDF
+    dpi = _raster_dpi()
+    max_px = (cint(frappe.conf.get("perimeter_raster_max_mpx")) or DEFAULT_RASTER_MAX_MPX) * 1_000_000
+    budget = cint(frappe.conf.get("perimeter_raster_timeout")) or DEFAULT_RASTER_TIMEOUT_S
+    deadline = perf_counter() + budget
+    try:
+        with span("raster"), fitz.open(src) as doc:
+            traced = []
+            for page in _pages(doc, max_rss_mb):
+                if perf_counter() > deadline:
+                    raise TimeoutError
+                traced.append(_raster_page_length_inches(page, dpi, max_px, deadline))
+                if progress:
+                    progress(len(traced), doc.page_count)
+    except MemoryError as e:
+        frappe.throw(str(e))
+    except TimeoutError:
+        frappe.throw(f"Tracing the rendered artwork ran past its {budget}s budget (perimeter_raster_timeout). Lower perimeter_raster_dpi or send vector artwork.")
+    except Exception as e:
+        frappe.log_error(f"Raster trace failed: {e}", "AI Perimeter")
+        return None
+
+    per_in = round(sum(length for length, _ in traced), 3)
+    if per_in <= 0:
+        return None
+    # approximate by nature: the dpi (lowered on pages past perimeter_raster_max_mpx) goes with the result
+    return {"perimeter_inches": per_in, "perimeter_lf": round(per_in / 12.0, 3), "source": "raster",
+            "engine": RASTER, "dpi": round(min(d for _, d in traced)),
+            "page_lengths_in": [round(length, 3) for length, _ in traced]}
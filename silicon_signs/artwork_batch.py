@@ -0,0 +1,240 @@
+"""Measure every artwork file in a directory or ZIP.
+
+Files are measured with the same core as ``calculate_perimeter`` (``api._calculate``, so the
+Perimeter Cache is shared) across a pool of processes. Results come back per file as soon as
+each one finishes:
+
+    bench --site <site> measure-artwork ./package.zip --format csv -o lengths.csv
+    enqueue_artwork_batch(file_url)  # uploaded ZIP; rows arrive over realtime, CSV/JSON saved as a File
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from time import perf_counter
+
+import frappe
+from frappe.utils import cint
+
+from silicon_signs import api
+
+ARTWORK_EXTENSIONS = (".pdf", ".ai", ".svg")
+FIELDS = [
+	"file",
+	"perimeter_inches",
+	"perimeter_lf",
+	"duplicate_inches",
+	"source",
+	"engine",
+	"pages",
+	"seconds",
+	"cache",
+	"error",
+]
+DEFAULT_MAX_ZIP_MB = 2048  # uncompressed size a package may expand to (site_config: perimeter_max_zip_mb)
+
+
+def _is_artwork(name):
+	return name.lower().endswith(ARTWORK_EXTENSIONS) and not os.path.basename(name).startswith(".")
+
+
+def collect_artwork(path, workdir):
+	"""[(name, local path)] sorted by name; ZIP members are extracted into ``workdir``."""
+	if os.path.isdir(path):
+		files = []
+		for root, _, names in os.walk(path):
+			for name in names:
+				if _is_artwork(name):
+					full = os.path.join(root, name)
+					files.append((os.path.relpath(full, path), full))
+		return sorted(files)
+
+	if zipfile.is_zipfile(path):
+		with zipfile.ZipFile(path) as zf:
+			members = sorted(
+				(
+					m
+					for m in zf.infolist()
+					if not m.is_dir() and _is_artwork(m.filename) and not m.filename.startswith("__MACOSX/")
+				),
+				key=lambda m: m.filename,
+			)
+			max_mb = cint(frappe.conf.get("perimeter_max_zip_mb")) or DEFAULT_MAX_ZIP_MB
+			if sum(m.file_size for m in members) > max_mb * (1 << 20):
+				frappe.throw(f"Artwork package expands to more than {max_mb} MB (perimeter_max_zip_mb).")
+			files = []
+			for i, m in enumerate(members):
+				# flat numbered names: member paths never touch the filesystem, so no zip-slip
+				target = os.path.join(workdir, f"{i:05d}{os.path.splitext(m.filename)[1].lower()}")
+				with zf.open(m) as fsrc, open(target, "wb") as fdst:
+					shutil.copyfileobj(fsrc, fdst, 1 << 20)
+				files.append((m.filename, target))
+			return files
+
+	if _is_artwork(path):
+		return [(os.path.basename(path), path)]
+	frappe.throw(f"Not a directory, ZIP or artwork file: {path}")
+
+
+@contextmanager
+def artwork_files(path):
+	with tempfile.TemporaryDirectory(prefix="silicon-signs-artwork-") as workdir:
+		yield collect_artwork(path, workdir)
+
+
+def _init_worker(site, sites_path):
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+
+
+def _measure_one(name, src, ov, engine, use_cache, breakdown):
+	row = {"file": name}
+	started = perf_counter()
+	try:
+		result = api._calculate(src, name, ov, engine, use_cache, breakdown=breakdown)
+		# the Perimeter Cache row, so the next run of the package is a cache hit
+		frappe.db.commit()  # nosemgrep: worker process outside a request, one file per transaction
+		row.update(
+			{
+				k: result.get(k)
+				for k in ("perimeter_inches", "perimeter_lf", "duplicate_inches", "source", "engine", "cache")
+			}
+		)
+		row["pages"] = len(result.get("page_lengths_in") or ())
+		if breakdown:
+			row["breakdown"] = result.get("breakdown")
+	except Exception as e:
+		frappe.db.rollback()
+		frappe.local.message_log = []
+		row["error"] = str(e) or e.__class__.__name__
+	row["seconds"] = round(perf_counter() - started, 3)
+	return row
+
+
+def measure_files(files, only_visible=False, engine=None, workers=None, use_cache=True, breakdown=False):
+	"""Yield one result row per file, in completion order."""
+	engine, workers = api._engine(engine), min(api._workers(workers), len(files) or 1)
+	args = (bool(only_visible), engine, bool(use_cache), bool(breakdown))
+	if workers <= 1:
+		for name, src in files:
+			yield _measure_one(name, src, *args)
+		return
+
+	# spawn, not fork: every worker opens its own site connection instead of inheriting this one
+	with ProcessPoolExecutor(
+		max_workers=workers,
+		mp_context=multiprocessing.get_context("spawn"),
+		initializer=_init_worker,
+		initargs=(frappe.local.site, os.path.abspath(frappe.local.sites_path)),
+	) as pool:
+		futures = [pool.submit(_measure_one, name, src, *args) for name, src in files]
+		for fut in as_completed(futures):
+			yield fut.result()
+
+
+class RowWriter:
+	"""Writes rows to ``out`` as they arrive: CSV with a header, or JSON Lines."""
+
+	def __init__(self, out, fmt="csv"):
+		if fmt not in ("csv", "json"):
+			frappe.throw(f"Unknown format: {fmt}")
+		self.out, self.fmt = out, fmt
+		if fmt == "csv":
+			self.writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction="ignore")
+			self.writer.writeheader()
+
+	def write(self, row):
+		if self.fmt == "csv":
+			self.writer.writerow(row)
+		else:
+			self.out.write(json.dumps(row, default=str) + "\n")
+		self.out.flush()
+
+
+# --- background job for uploaded packages ---
+
+
+def _uploaded_file_path(file_url):
+	"""Local path of an uploaded File the session user may read; never a folder or anything outside
+	the site's files folders, since the job would measure whatever the path holds."""
+	file_doc = frappe.get_doc("File", {"file_url": file_url})
+	file_doc.check_permission("read")
+	if file_doc.is_folder:
+		frappe.throw(f"Not a file: {file_url}")
+	src = os.path.realpath(file_doc.get_full_path())
+	roots = [os.path.realpath(frappe.get_site_path(base, "files")) for base in ("public", "private")]
+	if not any(os.path.commonpath([root, src]) == root for root in roots) or not os.path.isfile(src):
+		frappe.throw(f"File not found: {file_url}")
+	return src
+
+
+@frappe.whitelist(methods=["POST"])
+def enqueue_artwork_batch(
+	file_url: str,
+	fmt: str = "csv",
+	only_visible: int = 0,
+	engine: str | None = None,
+	workers: int | None = None,
+	use_cache: int = 1,
+	breakdown: int = 0,
+):
+	"""Measure an uploaded ZIP (or single file) in a background job.
+
+	Each finished file is published on ``perimeter_progress`` with its row; the full CSV/JSON is
+	saved as a private File whose URL is in the final status (see api.get_perimeter_job).
+	"""
+	src = _uploaded_file_path(file_url)
+	if fmt not in ("csv", "json"):
+		frappe.throw(f"Unknown format: {fmt}")
+	job_id = frappe.generate_hash(length=12)
+	api._set_job_status(job_id, frappe.session.user, status="queued")
+	frappe.enqueue(
+		"silicon_signs.artwork_batch._artwork_batch_job",
+		queue="long",
+		timeout=4 * 3600,
+		token=job_id,
+		src=src,
+		fmt=fmt,
+		ov=api._as_bool(only_visible),
+		engine=api._engine(engine),
+		workers=api._workers(workers),
+		use_cache=api._as_bool(use_cache),
+		breakdown=api._as_bool(breakdown),
+		user=frappe.session.user,
+	)
+	return {"status": "queued", "job_id": job_id}
+
+
+def _artwork_batch_job(token, src, fmt, ov, engine, workers, use_cache, breakdown, user):
+	# `token` rather than `job_id`: frappe.enqueue consumes a job_id kwarg itself
+	buf = io.StringIO()
+	writer = RowWriter(buf, fmt)
+	done = failed = 0
+	try:
+		with artwork_files(src) as files:
+			api._set_job_status(token, user, status="running", done=0, total=len(files))
+			for row in measure_files(files, ov, engine, workers, use_cache, breakdown):
+				writer.write(row)
+				done += 1
+				failed += bool(row.get("error"))
+				api._set_job_status(token, user, status="running", done=done, total=len(files), row=row)
+	except Exception as e:
+		api._set_job_status(token, user, status="failed", error=str(e))
+		return
+
+	output = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": f"artwork-measurements-{token}.{'csv' if fmt == 'csv' else 'jsonl'}",
+			"is_private": 1,
+			"content": buf.getvalue(),
+		}
+	).insert(ignore_permissions=True)
+	api._set_job_status(token, user, status="done", done=done, failed=failed, file_url=output.file_url)
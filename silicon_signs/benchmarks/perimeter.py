@@ -0,0 +1,264 @@
+"""Perimeter measurement benchmark over a generated artwork corpus.
+
+Every case is a PDF built in memory with PyMuPDF, so results need no fixtures and, where the
+geometry allows it, come with an analytic perimeter to measure error against.
+
+    bench --site <site> execute silicon_signs.benchmarks.perimeter.run --kwargs "{'output': 'before.json'}"
+    python -m silicon_signs.benchmarks.perimeter --output after.json
+    python -m silicon_signs.benchmarks.perimeter --compare before.json after.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import fitz
+
+from silicon_signs import api
+
+BEZ_TOLERANCES = (1.0, 0.25, 0.05)
+
+# --- corpus -----------------------------------------------------------------
+
+
+def _circles(n=400, r=18.0):
+	doc = fitz.open()
+	page = doc.new_page(width=1224, height=792)
+	shape = page.new_shape()
+	per_row = 30
+	for i in range(n):
+		shape.draw_circle((30 + (i % per_row) * 39, 30 + (i // per_row) * 39), r)
+	shape.finish(color=(0, 0, 0))
+	shape.commit()
+	# draw_circle emits 4 cubics per circle
+	return doc, {"curves": 4 * n, "expected_pt": n * 2 * math.pi * r}
+
+
+def _rectangles(n=2000, w=20.0, h=8.0):
+	doc = fitz.open()
+	page = doc.new_page(width=1224, height=792)
+	shape = page.new_shape()
+	per_row = 50
+	for i in range(n):
+		x, y = 10 + (i % per_row) * 24, 10 + (i // per_row) * 12
+		shape.draw_rect(fitz.Rect(x, y, x + w, y + h))
+	shape.finish(color=(0, 0, 0))
+	shape.commit()
+	return doc, {"curves": 0, "expected_pt": n * 2 * (w + h)}
+
+
+def _tiny_subpaths(n=5000, side=2.0, specks=2000):
+	"""Many small closed polylines plus sub-threshold specks that MIN_SUBPATH_LEN_PT must drop."""
+	doc = fitz.open()
+	page = doc.new_page(width=1224, height=792)
+	shape = page.new_shape()
+	per_row = 100
+	for i in range(n):
+		x, y = 5 + (i % per_row) * 12, 5 + (i // per_row) * 12
+		shape.draw_polyline([(x, y), (x + side, y), (x + side, y + side), (x, y + side), (x, y)])
+	speck = api.MIN_SUBPATH_LEN_PT / 8
+	for i in range(specks):
+		x, y = 8 + (i % per_row) * 12, 8 + (i // per_row) * 12
+		shape.draw_polyline([(x, y), (x + speck, y), (x + speck, y + speck), (x, y + speck), (x, y)])
+	shape.finish(color=(0, 0, 0))
+	shape.commit()
+	return doc, {"curves": 0, "expected_pt": n * 4 * side}
+
+
+def _text_outlines(repeat=12):
+	"""Glyph outlines as real vector paths: text -> SVG (text_as_path) -> PDF. No analytic length."""
+	src = fitz.open()
+	page = src.new_page(width=1224, height=792)
+	for i in range(repeat):
+		page.insert_text(
+			(20, 50 + i * 58), "Silicon Signs Channel Letters 0123456789", fontsize=44, fontname="tiro"
+		)
+	svg = page.get_svg_image(text_as_path=True)
+	doc = fitz.open("pdf", fitz.open(stream=svg.encode(), filetype="svg").convert_to_pdf())
+	curves = sum(1 for d in doc[0].get_drawings() for it in d["items"] if it[0] == "c")
+	return doc, {"curves": curves, "expected_pt": None}
+
+
+def _multi_page(pages=40, per_page=60, r=24.0):
+	doc = fitz.open()
+	for _ in range(pages):
+		page = doc.new_page(width=792, height=612)
+		shape = page.new_shape()
+		for i in range(per_page):
+			shape.draw_circle((40 + (i % 12) * 60, 40 + (i // 12) * 60), r)
+		shape.finish(color=(0, 0, 0))
+		shape.commit()
+	return doc, {"curves": 4 * pages * per_page, "expected_pt": pages * per_page * 2 * math.pi * r}
+
+
+def _stacked_copies(n=300, copies=3, r=18.0):
+	"""Every outline drawn ``copies`` times, as Illustrator exports often are; each counts once."""
+	doc = fitz.open()
+	page = doc.new_page(width=1224, height=792)
+	per_row = 30
+	for _ in range(copies):
+		shape = page.new_shape()
+		for i in range(n):
+			shape.draw_circle((30 + (i % per_row) * 39, 30 + (i // per_row) * 39), r)
+		shape.finish(color=(0, 0, 0))
+		shape.commit()
+	return doc, {"curves": 4 * n * copies, "expected_pt": n * 2 * math.pi * r}
+
+
+CASES = {
+	"circles": _circles,
+	"rectangles": _rectangles,
+	"tiny_subpaths": _tiny_subpaths,
+	"text_outlines": _text_outlines,
+	"multi_page": _multi_page,
+	"stacked_copies": _stacked_copies,
+}
+
+
+def build_corpus(cases=None):
+	corpus = {}
+	for name in cases or CASES:
+		doc, meta = CASES[name]()
+		corpus[name] = (doc.tobytes(), {**meta, "pages": doc.page_count})
+		doc.close()
+	return corpus
+
+
+# --- engines ----------------------------------------------------------------
+
+
+@contextmanager
+def _bez_tol(tol):
+	saved = api.BEZ_TOL_PT
+	api.BEZ_TOL_PT = tol
+	try:
+		yield
+	finally:
+		api.BEZ_TOL_PT = saved
+
+
+def _measure_pdf_bytes(data, engine):
+	"""Length in points, including the open cost, exactly as the endpoint pays it."""
+	with fitz.open("pdf", data) as doc:
+		if engine == "svg_fallback":
+			return sum(api._svg_page_length_inches(page) for page in doc) * 72.0
+		page_length_points = api.ENGINES[engine]
+		return sum(page_length_points(page) for page in doc)
+
+
+def _variants():
+	for tol in BEZ_TOLERANCES:
+		yield "python", {"bez_tol_pt": tol}
+	yield "numpy", {}
+	yield "svg_fallback", {}
+
+
+def run_case(name, data, meta, engine, setting, repeat=3):
+	timings = []
+	measured = 0.0
+	with _bez_tol(setting.get("bez_tol_pt", api.BEZ_TOL_PT)):
+		for _ in range(repeat):
+			started = time.perf_counter()
+			measured = _measure_pdf_bytes(data, engine)
+			timings.append(time.perf_counter() - started)
+		# tracemalloc slows the python engine several fold, so allocation gets its own untimed pass
+		tracemalloc.start()
+		_measure_pdf_bytes(data, engine)
+		_, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+
+	seconds = min(timings)
+	expected = meta["expected_pt"]
+	return {
+		"case": name,
+		"engine": engine,
+		"setting": setting,
+		"pages": meta["pages"],
+		"curves": meta["curves"],
+		"seconds": round(seconds, 6),
+		"pages_per_sec": round(meta["pages"] / seconds, 2) if seconds else None,
+		"curves_per_sec": round(meta["curves"] / seconds, 1) if seconds and meta["curves"] else None,
+		"peak_python_kb": round(peak / 1024, 1),
+		"measured_in": round(measured / 72.0, 4),
+		"expected_in": round(expected / 72.0, 4) if expected else None,
+		"error_pct": round(100.0 * (measured - expected) / expected, 5) if expected else None,
+	}
+
+
+def run(output=None, cases=None, repeat=3):
+	"""Run every case against every engine/setting; returns the report and writes it to `output`."""
+	corpus = build_corpus(cases)
+	results = []
+	for name, (data, meta) in corpus.items():
+		for engine, setting in _variants():
+			results.append(run_case(name, data, meta, engine, setting, repeat))
+
+	report = {
+		"meta": {
+			"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"python": platform.python_version(),
+			"pymupdf": fitz.VersionBind,
+			"machine": platform.machine(),
+			"bez_tol_pt": api.BEZ_TOL_PT,
+			"min_subpath_len_pt": api.MIN_SUBPATH_LEN_PT,
+			"dedupe_grid_pt": api.DEDUPE_GRID_PT,
+			"repeat": repeat,
+		},
+		"results": results,
+	}
+	output = output or f"perimeter-benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+	with open(output, "w") as f:
+		json.dump(report, f, indent=1)
+	_print_table(results)
+	print(f"\nwrote {output}")
+	return report
+
+
+def compare(before, after):
+	"""Print time and error deltas between two saved runs, matched on case/engine/setting."""
+
+	def load(path):
+		with open(path) as f:
+			return {
+				(r["case"], r["engine"], json.dumps(r["setting"], sort_keys=True)): r
+				for r in json.load(f)["results"]
+			}
+
+	a, b = load(before), load(after)
+	print(f"{'case':<15}{'engine':<14}{'setting':<22}{'time x':>9}{'err % before':>14}{'err % after':>13}")
+	for key in sorted(a.keys() & b.keys()):
+		ra, rb = a[key], b[key]
+		speedup = ra["seconds"] / rb["seconds"] if rb["seconds"] else float("inf")
+		print(
+			f"{key[0]:<15}{key[1]:<14}{key[2]:<22}{speedup:>9.2f}{ra['error_pct']!s:>14}{rb['error_pct']!s:>13}"
+		)
+
+
+def _print_table(results):
+	print(
+		f"{'case':<15}{'engine':<14}{'setting':<22}{'sec':>9}{'curves/s':>12}{'pages/s':>9}{'peak kB':>9}{'err %':>10}"
+	)
+	for r in results:
+		print(
+			f"{r['case']:<15}{r['engine']:<14}{json.dumps(r['setting']):<22}{r['seconds']:>9.4f}"
+			f"{r['curves_per_sec']!s:>12}{r['pages_per_sec']!s:>9}{r['peak_python_kb']:>9}{r['error_pct']!s:>10}"
+		)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+	)
+	parser.add_argument("--output")
+	parser.add_argument("--case", action="append", choices=sorted(CASES))
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+	args = parser.parse_args()
+	if args.compare:
+		compare(*args.compare)
+	else:
+		run(args.output, args.case, args.repeat)
@@ -0,0 +1,164 @@
+"""Pricing engine throughput benchmark.
+
+Synthetic Sign Pricing Templates with 10-1000 rules are priced against random attribute sets:
+
+- compiled rule-set evaluation alone (no site needed): prices/sec and allocations per price
+- price_item_by_attributes end to end (needs a site): prices/sec and DB queries per price
+- SignConfiguration.calculate_pricing with a prefetched PricingContext
+
+    bench --site <site> execute silicon_signs.benchmarks.pricing.run --kwargs "{'output': 'pricing.json'}"
+    python -m silicon_signs.benchmarks.pricing --output pricing.json   # compiled evaluation only
+
+The query-count budget itself is enforced in test_sign_pricing_template / test_sign_configuration.
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+import frappe
+
+from silicon_signs.silicon_signs.doctype.sign_pricing_template.rule_set import CompiledRuleSet
+from silicon_signs.tests.utils import (
+	BENCH_TEMPLATE_ITEM,
+	count_queries,
+	fake_pricing_context,
+	random_attributes,
+	synthetic_profile,
+	synthetic_rules,
+)
+
+SIZES = (10, 100, 1000)
+
+
+def _timed(fn, samples):
+	# timed pass first; tracemalloc slows everything down, so allocation gets its own shorter pass
+	started = time.perf_counter()
+	for i in range(samples):
+		fn(i)
+	seconds = time.perf_counter() - started
+
+	tracemalloc.start()
+	for i in range(min(samples, 200)):
+		fn(i)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return seconds, peak
+
+
+def bench_compiled(n_rules, samples, rng):
+	rule_set = CompiledRuleSet(synthetic_profile(n_rules, rng))
+	attrs = [random_attributes(rng) for _ in range(samples)]
+	seconds, peak = _timed(lambda i: rule_set.evaluate(attrs[i]), samples)
+	return {
+		"bench": "compiled_evaluate",
+		"rules": n_rules,
+		"samples": samples,
+		"prices_per_sec": round(samples / seconds, 1),
+		"peak_kb": round(peak / 1024, 1),
+	}
+
+
+def bench_endpoint(n_rules, samples, rng):
+	from silicon_signs.silicon_signs.doctype.sign_pricing_template.api import price_item_by_attributes
+
+	profile = frappe.get_doc(
+		{
+			"doctype": "Sign Pricing Template",
+			"sign_template": BENCH_TEMPLATE_ITEM,
+			"base_price": 250,
+			"rounding": "0.01",
+			"rules": synthetic_rules(n_rules, rng),
+		}
+	).insert(ignore_links=True, ignore_permissions=True)
+	try:
+		attrs = [random_attributes(rng) for _ in range(samples)]
+		price_item_by_attributes(BENCH_TEMPLATE_ITEM, attrs[0], profile_name=profile.name)  # warm the cache
+		with count_queries() as queries:
+			seconds, peak = _timed(
+				lambda i: price_item_by_attributes(BENCH_TEMPLATE_ITEM, attrs[i], profile_name=profile.name),
+				samples,
+			)
+	finally:
+		frappe.db.rollback()
+	return {
+		"bench": "price_item_by_attributes",
+		"rules": n_rules,
+		"samples": samples,
+		"prices_per_sec": round(samples / seconds, 1),
+		"peak_kb": round(peak / 1024, 1),
+		"queries_per_price": round(len(queries) / samples, 3),
+	}
+
+
+def bench_calculate_pricing(samples, rng):
+	from silicon_signs.silicon_signs.doctype.sign_configuration.sign_configuration import SignConfiguration
+
+	ctx = fake_pricing_context({"led_item": "LED", "sheet_item": "SHEET"})
+	docs = []
+	for _ in range(samples):
+		doc = SignConfiguration.__new__(SignConfiguration)
+		doc.__dict__.update(
+			perimeter_inches=rng.uniform(50, 600),
+			led_count=rng.randint(10, 400),
+			sheet_count=rng.randint(1, 6),
+			paint_returns=rng.random() > 0.5,
+			trim_cap=rng.random() > 0.5,
+			raceway_wireway_backer=0,
+			vinyl_rta=rng.random() > 0.5,
+			vinyl_printed=0,
+			crating_fee=1,
+			lighting_type=rng.choice(("Face-lit", "Reverse halo", "Dual Lit")),
+			mounting_type=rng.choice(("Raceway", "Wireway/Backer", "Flush")),
+		)
+		docs.append(doc)
+	seconds, peak = _timed(lambda i: docs[i].calculate_pricing(ctx), samples)
+	return {
+		"bench": "calculate_pricing",
+		"rules": None,
+		"samples": samples,
+		"prices_per_sec": round(samples / seconds, 1),
+		"peak_kb": round(peak / 1024, 1),
+	}
+
+
+def run(output=None, sizes=SIZES, samples=2000, seed=42):
+	rng = random.Random(seed)
+	with_site = bool(getattr(frappe.local, "site", None))
+	results = [bench_compiled(n, samples, rng) for n in sizes]
+	results.append(bench_calculate_pricing(samples, rng))
+	if with_site:
+		results.extend(bench_endpoint(n, samples, rng) for n in sizes)
+
+	report = {
+		"meta": {
+			"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"samples": samples,
+			"seed": seed,
+			"site": with_site,
+		},
+		"results": results,
+	}
+	output = output or f"pricing-benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+	with open(output, "w") as f:
+		json.dump(report, f, indent=1)
+	for r in results:
+		print(
+			f"{r['bench']:<26}{r['rules']!s:>6} rules {r['prices_per_sec']:>12} prices/s "
+			f"{r['peak_kb']:>9} kB peak  queries/price={r.get('queries_per_price', '-')}"
+		)
+	print(f"\nwrote {output}")
+	return report
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(
+		description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+	)
+	parser.add_argument("--output")
+	parser.add_argument("--samples", type=int, default=2000)
+	parser.add_argument("--size", type=int, action="append")
+	args = parser.parse_args()
+	run(args.output, tuple(args.size or SIZES), args.samples)
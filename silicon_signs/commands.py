@@ -0,0 +1,43 @@
+import sys
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("measure-artwork")
+@click.argument("path", type=click.Path(exists=True))
+@click.option("--format", "fmt", type=click.Choice(["csv", "json"]), default="csv", help="CSV, or JSON Lines")
+@click.option("--output", "-o", type=click.Path(), help="Write here instead of stdout")
+@click.option("--workers", type=int, help="Processes measuring in parallel (capped by perimeter_max_workers)")
+@click.option("--engine", type=click.Choice(["python", "numpy", "raster"]))
+@click.option("--only-visible", is_flag=True, default=False)
+@click.option("--breakdown", is_flag=True, default=False, help="Per layer / colour lengths (JSON only)")
+@click.option("--no-cache", is_flag=True, default=False, help="Measure even if Perimeter Cache has the file")
+@pass_context
+def measure_artwork(context, path, fmt, output, workers, engine, only_visible, breakdown, no_cache):
+	"""Measure every PDF/AI/SVG file in a directory or ZIP; one row per file as it finishes."""
+	from silicon_signs.artwork_batch import RowWriter, artwork_files, measure_files
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	out = open(output, "w", newline="") if output else sys.stdout
+	failed = 0
+	try:
+		writer = RowWriter(out, fmt)
+		with artwork_files(path) as files:
+			for row in measure_files(
+				files, only_visible, engine, workers or len(files), not no_cache, breakdown
+			):
+				writer.write(row)
+				failed += bool(row.get("error"))
+	finally:
+		if output:
+			out.close()
+		frappe.destroy()
+	if failed:
+		click.secho(f"{failed} file(s) could not be measured", fg="yellow", err=True)
+
+
+commands = [measure_artwork]
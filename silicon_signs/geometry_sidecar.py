@@ -0,0 +1,247 @@
+"""Flattened page geometry saved on the first measurement, so re-measuring skips PyMuPDF.
+
+A sidecar is an uncompressed ``.npz`` (a zip of ``.npy`` members) keyed by the file's content
+hash, holding every drawing of every page as it came out of ``get_cdrawings()``:
+
+- ``p<i>.ops``    int8 (N,)       item kind: 0 line, 1 cubic, 2 rect, 3 quad
+- ``p<i>.xy``     float64 (N, 8)  item coordinates, zero padded: line p0 p1, cubic p0..p3,
+                                  rect x0 y0 x1 y1, quad ul ur ll lr
+- ``p<i>.owner``  int32 (N,)      index of the drawing each item belongs to
+- per drawing (D,): ``close``, ``kind`` (-1, s, f, fs), ``layer`` (-1 or an index into
+  ``p<i>.layers``), ``stroke_opacity`` / ``fill_opacity`` (NaN for None), ``color`` / ``fill``
+  (D, 4; NaN padded, all NaN for None) and ``rect`` (D, 4)
+- ``p<i>.page_rect`` (4,) the visible area in drawing coordinates, and ``meta.json`` (version, content hash, page count, hidden layers)
+
+Nothing is filtered on the way in, so a later measurement with other knobs (only_visible,
+tolerances, breakdown) reads the same file. Pages are read back one at a time.
+"""
+
+import json
+import os
+import zipfile
+
+import frappe
+import numpy as np
+
+SIDECAR_VERSION = 2  # 2: page_rect is the unrotated crop area
+SIDECAR_DIR = "perimeter_geometry"  # under the site's private folder, never served
+
+_OPS = {"l": 0, "c": 1, "re": 2, "qu": 3}
+_KINDS = ("s", "f", "fs")
+_NAN4 = (np.nan,) * 4
+
+
+def sidecar_path(content_hash):
+	return frappe.get_site_path("private", SIDECAR_DIR, f"{content_hash}.npz")
+
+
+def remove_sidecars(content_hashes):
+	for content_hash in content_hashes:
+		try:
+			os.remove(sidecar_path(content_hash))
+		except FileNotFoundError:
+			pass
+
+
+def _pad4(c):
+	return _NAN4 if c is None else (tuple(c) + _NAN4)[:4]
+
+
+def _unpad(row):
+	return None if row[0] != row[0] else tuple(v for v in row if v == v)  # v != v only for NaN
+
+
+def _opacity(v):
+	return np.nan if v is None else v
+
+
+class PackedPage:
+	"""One page's drawings as arrays; ``drawings()`` gives them back as get_cdrawings() dicts."""
+
+	ARRAYS = (
+		"ops",
+		"xy",
+		"owner",
+		"close",
+		"kind",
+		"layer",
+		"stroke_opacity",
+		"fill_opacity",
+		"color",
+		"fill",
+		"rect",
+		"layers",
+		"page_rect",
+	)
+
+	def __init__(self, **arrays):
+		for name in self.ARRAYS:
+			setattr(self, name, arrays[name])
+
+	def drawing_attrs(self):
+		"""Per drawing attribute dicts without items: enough for the visibility filter and grouping."""
+		layers = self.layers.tolist()
+		return [
+			{
+				"closePath": close,
+				"type": _KINDS[kind] if kind >= 0 else None,
+				"layer": layers[layer] if layer >= 0 else None,
+				"stroke_opacity": None if so != so else so,
+				"fill_opacity": None if fo != fo else fo,
+				"color": _unpad(color),
+				"fill": _unpad(fill),
+				"rect": _unpad(rect),
+			}
+			for close, kind, layer, so, fo, color, fill, rect in zip(
+				self.close.tolist(),
+				self.kind.tolist(),
+				self.layer.tolist(),
+				self.stroke_opacity.tolist(),
+				self.fill_opacity.tolist(),
+				self.color.tolist(),
+				self.fill.tolist(),
+				self.rect.tolist(),
+				strict=True,
+			)
+		]
+
+	def drawings(self):
+		drawings = self.drawing_attrs()
+		for d in drawings:
+			d["items"] = []
+		for op, r, owner in zip(self.ops.tolist(), self.xy.tolist(), self.owner.tolist(), strict=True):
+			if op == 0:
+				item = ("l", (r[0], r[1]), (r[2], r[3]))
+			elif op == 1:
+				item = ("c", (r[0], r[1]), (r[2], r[3]), (r[4], r[5]), (r[6], r[7]))
+			elif op == 2:
+				item = ("re", (r[0], r[1], r[2], r[3]), 0)
+			else:
+				item = ("qu", ((r[0], r[1]), (r[2], r[3]), (r[4], r[5]), (r[6], r[7])))
+			drawings[owner]["items"].append(item)
+		return drawings
+
+
+def pack_page(drawings, page_rect):
+	"""Pack get_cdrawings() output (get_drawings() dicts index alike); malformed items are dropped."""
+	ops, xy, owner = [], [], []
+	close, kind, layer, so, fo, color, fill, rect = [], [], [], [], [], [], [], []
+	layers, layer_index = [], {}
+	for n, d in enumerate(drawings):
+		for it in d.get("items") or ():
+			if not it:
+				continue
+			op = _OPS.get(it[0])
+			try:
+				if op == 0:
+					p0, p1 = it[1], it[2]
+					row = (p0[0], p0[1], p1[0], p1[1], 0, 0, 0, 0)
+				elif op == 1:
+					p0, p1, p2, p3 = it[1], it[2], it[3], it[4]
+					row = (p0[0], p0[1], p1[0], p1[1], p2[0], p2[1], p3[0], p3[1])
+				elif op == 2:
+					r = it[1]
+					row = (r[0], r[1], r[2], r[3], 0, 0, 0, 0)
+				elif op == 3:
+					ul, ur, ll, lr = it[1]
+					row = (ul[0], ul[1], ur[0], ur[1], ll[0], ll[1], lr[0], lr[1])
+				else:
+					continue
+			except Exception:
+				continue
+			ops.append(op)
+			xy.append(row)
+			owner.append(n)
+
+		name = d.get("layer")
+		if name is not None and name not in layer_index:
+			layer_index[name] = len(layers)
+			layers.append(name)
+		close.append(bool(d.get("closePath")))
+		kind.append(_KINDS.index(d.get("type")) if d.get("type") in _KINDS else -1)
+		layer.append(layer_index[name] if name is not None else -1)
+		# a missing opacity reads as 1.0 in the visibility filter; None (unpainted) stays None
+		so.append(_opacity(d.get("stroke_opacity", 1.0)))
+		fo.append(_opacity(d.get("fill_opacity", 1.0)))
+		color.append(_pad4(d.get("color")))
+		fill.append(_pad4(d.get("fill")))
+		rect.append(_pad4(d.get("rect")))
+
+	return PackedPage(
+		ops=np.array(ops, dtype=np.int8),
+		xy=np.array(xy, dtype=float).reshape(-1, 8),
+		owner=np.array(owner, dtype=np.int32),
+		close=np.array(close, dtype=bool),
+		kind=np.array(kind, dtype=np.int8),
+		layer=np.array(layer, dtype=np.int32),
+		stroke_opacity=np.array(so, dtype=float),
+		fill_opacity=np.array(fo, dtype=float),
+		color=np.array(color, dtype=float).reshape(-1, 4),
+		fill=np.array(fill, dtype=float).reshape(-1, 4),
+		rect=np.array(rect, dtype=float).reshape(-1, 4),
+		layers=np.array(layers, dtype=str),
+		page_rect=np.array(tuple(page_rect), dtype=float),
+	)
+
+
+class SidecarWriter:
+	"""Streams pages into a temporary zip as they are measured (in any order); ``close`` publishes it."""
+
+	def __init__(self, path, content_hash):
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		self.path, self.content_hash = path, content_hash
+		self.tmp = f"{path}.{os.getpid()}.tmp"
+		self.zf = zipfile.ZipFile(self.tmp, "w", zipfile.ZIP_STORED, allowZip64=True)
+
+	def add(self, i, page):
+		for name in PackedPage.ARRAYS:
+			with self.zf.open(f"p{i}.{name}.npy", "w", force_zip64=True) as f:
+				np.lib.format.write_array(f, getattr(page, name), allow_pickle=False)
+
+	def close(self, page_count, hidden_layers=()):
+		meta = {
+			"version": SIDECAR_VERSION,
+			"content_hash": self.content_hash,
+			"page_count": page_count,
+			"hidden_layers": sorted(hidden_layers),
+		}
+		self.zf.writestr("meta.json", json.dumps(meta))
+		self.zf.close()
+		os.replace(self.tmp, self.path)  # readers only ever see a complete file
+
+	def abort(self):
+		self.zf.close()
+		try:
+			os.remove(self.tmp)
+		except FileNotFoundError:
+			pass
+
+
+class Sidecar:
+	def __init__(self, path, content_hash):
+		self.zf = zipfile.ZipFile(path)
+		try:
+			meta = json.loads(self.zf.read("meta.json"))
+			if meta.get("version") != SIDECAR_VERSION or meta.get("content_hash") != content_hash:
+				raise ValueError(f"Stale geometry sidecar: {path}")
+		except Exception:
+			self.zf.close()
+			raise
+		self.page_count = meta["page_count"]
+		self.hidden_layers = frozenset(meta.get("hidden_layers") or ())
+
+	def page(self, i):
+		arrays = {}
+		for name in PackedPage.ARRAYS:
+			with self.zf.open(f"p{i}.{name}.npy") as f:
+				arrays[name] = np.lib.format.read_array(f, allow_pickle=False)
+		return PackedPage(**arrays)
+
+	def close(self):
+		self.zf.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
@@ -26,7 +26,7 @@ app_license = "mit"
 
 # include js, css files in header of desk.html
 # app_include_css = "/assets/silicon_signs/css/silicon_signs.css"
-app_include_js = ["/assets/silicon_signs/js/quotation.js","/assets/silicon_signs/js/opportunity.js"]
+# app_include_js = "/assets/silicon_signs/js/silicon_signs.js"
 
 # include js, css files in header of web template
 # web_include_css = "/assets/silicon_signs/css/silicon_signs.css"
@@ -43,7 +43,11 @@ app_include_js = ["/assets/silicon_signs/js/quotation.js","/assets/silicon_signs
 # page_js = {"page" : "public/js/file.js"}
 
 # include js in doctype views
-# doctype_js = {"Quotation" : "silicon_signs/silicon_signs/selling/doctype/quotation/quotation.js"}
+# loaded with the Quotation / Opportunity forms only, not on every desk page
+doctype_js = {
+	"Quotation": "public/js/quotation.js",
+	"Opportunity": "public/js/opportunity.js",
+}
 # doctype_list_js = {"doctype" : "public/js/doctype_list.js"}
 # doctype_tree_js = {"doctype" : "public/js/doctype_tree.js"}
 # doctype_calendar_js = {"doctype" : "public/js/doctype_calendar.js"}
@@ -145,6 +149,22 @@ app_include_js = ["/assets/silicon_signs/js/quotation.js","/assets/silicon_signs
 # 	}
 # }
 
+doc_events = {
+	"Item": {
+		"on_update": "silicon_signs.silicon_signs.doctype.sign_pricing_template.api.on_item_change",
+		"on_trash": "silicon_signs.silicon_signs.doctype.sign_pricing_template.api.on_item_change",
+		"after_rename": "silicon_signs.silicon_signs.doctype.sign_pricing_template.api.on_item_change",
+	},
+	"Item Attribute": {
+		"on_update": "silicon_signs.silicon_signs.doctype.sign_pricing_template.api.on_item_attribute_change",
+		"on_trash": "silicon_signs.silicon_signs.doctype.sign_pricing_template.api.on_item_attribute_change",
+		"after_rename": "silicon_signs.silicon_signs.doctype.sign_pricing_template.api.on_item_attribute_change",
+	},
+}
+
+# bench clear-cache / migrate also drop the compiled pricing rule sets
+clear_cache = "silicon_signs.silicon_signs.doctype.sign_pricing_template.rule_set.clear_rule_set_cache"
+
 # Scheduled Tasks
 # ---------------
 
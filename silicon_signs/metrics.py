@@ -0,0 +1,124 @@
+"""Lightweight timing metrics for the perimeter and pricing hot paths.
+
+An endpoint wrapped in ``timed`` collects named spans (``span("get_drawings")`` etc.) into
+``frappe.local`` for the duration of the call, then pushes every span plus the total into a
+capped redis list per endpoint/span in one pipeline. ``get_metrics`` turns those samples into
+p50/p95/p99; the Silicon Signs Metrics page renders them.
+
+Spans are no-ops outside a timed call (pool workers, bench console), so they cost nothing there.
+"""
+
+import math
+from contextlib import contextmanager
+from time import perf_counter
+
+import frappe
+
+METRICS_KEY = "silicon_signs_metrics"
+MAX_SAMPLES = 1000  # per endpoint/span; older samples are trimmed away
+
+
+def _index_key():
+	return f"{METRICS_KEY}:index"
+
+
+def _samples_key(endpoint, name):
+	return f"{METRICS_KEY}:{endpoint}:{name}"
+
+
+@contextmanager
+def span(name):
+	spans = getattr(frappe.local, "metric_spans", None)
+	if spans is None:
+		yield
+		return
+	started = perf_counter()
+	try:
+		yield
+	finally:
+		# spans with the same name add up, e.g. get_drawings over every page
+		spans[name] = spans.get(name, 0.0) + (perf_counter() - started) * 1000.0
+
+
+@contextmanager
+def timed(endpoint):
+	if getattr(frappe.local, "metric_spans", None) is not None:
+		# nested endpoint (configure_and_add_variant -> price_item_by_attributes): the caller owns the spans
+		yield
+		return
+	spans = frappe.local.metric_spans = {}
+	started = perf_counter()
+	try:
+		yield
+	except Exception:
+		spans["error"] = 0.0  # counted, not timed
+		raise
+	finally:
+		spans["total"] = (perf_counter() - started) * 1000.0
+		frappe.local.metric_spans = None
+		record(endpoint, spans)
+
+
+def record(endpoint, spans):
+	try:
+		cache = frappe.cache()
+		pipe = cache.pipeline()
+		for name, ms in spans.items():
+			key = cache.make_key(_samples_key(endpoint, name))
+			pipe.lpush(key, round(ms, 3))
+			pipe.ltrim(key, 0, MAX_SAMPLES - 1)
+		pipe.sadd(cache.make_key(_index_key()), *(f"{endpoint}:{name}" for name in spans))
+		pipe.execute()
+	except Exception:
+		pass  # metrics must never fail the call they are measuring
+
+
+def _percentile(ordered, q):
+	# nearest-rank, so every reported value is a real sample
+	return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))]
+
+
+def summarize(samples):
+	ordered = sorted(samples)
+	if not ordered:
+		return {"count": 0}
+	return {
+		"count": len(ordered),
+		"mean": round(sum(ordered) / len(ordered), 3),
+		"p50": _percentile(ordered, 50),
+		"p95": _percentile(ordered, 95),
+		"p99": _percentile(ordered, 99),
+		"max": ordered[-1],
+	}
+
+
+def _decode(v):
+	return v.decode() if isinstance(v, bytes) else v
+
+
+@frappe.whitelist()
+def get_metrics(endpoint: str | None = None):
+	"""{endpoint: {span: {count, mean, p50, p95, p99, max}}} in milliseconds, over the last MAX_SAMPLES calls."""
+	frappe.only_for("System Manager")
+	cache = frappe.cache()
+	out = {}
+	for entry in sorted(_decode(m) for m in cache.smembers(_index_key()) or ()):
+		ep, name = entry.rsplit(":", 1)
+		if endpoint and ep != endpoint:
+			continue
+		samples = [float(_decode(v)) for v in cache.lrange(_samples_key(ep, name), 0, -1) or ()]
+		stats = summarize(samples)
+		if name == "error":
+			stats = {"count": stats["count"]}
+		out.setdefault(ep, {})[name] = stats
+	return out
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_metrics():
+	frappe.only_for("System Manager")
+	cache = frappe.cache()
+	for entry in cache.smembers(_index_key()) or ():
+		ep, name = _decode(entry).rsplit(":", 1)
+		cache.delete_value(_samples_key(ep, name))
+	cache.delete_value(_index_key())
@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+	"""Sign Configuration is now submittable. Sites that customised its permissions keep their Custom
+	DocPerm rows, which replace the doctype's own, so roles that could write it may now submit, cancel
+	and amend it too."""
+	filters = {"parent": "Sign Configuration", "permlevel": 0, "write": 1}
+	if not frappe.db.exists("Custom DocPerm", filters):
+		return
+	frappe.db.set_value("Custom DocPerm", filters, {"submit": 1, "cancel": 1, "amend": 1})
+	frappe.clear_cache(doctype="Sign Configuration")
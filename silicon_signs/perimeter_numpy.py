@@ -0,0 +1,399 @@
+"""Vectorised vector-length engine.
+
+Walks the drawing items once to pack lines and cubics into NumPy arrays tagged with their
+subpath id, measuring them ``CHUNK`` segments at a time:
+
+- lines: plain hypot over the endpoint deltas
+- cubics: fixed 16-point Gauss-Legendre quadrature of |B'(t)| over [0, 1]
+- rects / quads: closed perimeters, each its own subpath
+
+Per-subpath lengths are summed with ``np.bincount`` so the ``MIN_SUBPATH_LEN_PT`` filter
+behaves exactly as in ``api._page_vector_length_points``.
+
+``packed_length_points`` does the same over a page already packed into arrays (a geometry
+sidecar, see ``geometry_sidecar``), finding subpath breaks with array operations instead.
+
+Tolerance: on smooth outlines (circles, glyph outlines) the quadrature agrees with the
+recursive ``_cubic_len`` walker to better than 0.1% of the page total; near-cusp curves,
+where the speed goes to zero, may differ by up to ``BEZ_TOL_PT`` per curve.
+"""
+
+import math
+
+import numpy as np
+
+_GL_X, _GL_W = np.polynomial.legendre.leggauss(16)
+_GL_T = (_GL_X + 1.0) / 2.0  # nodes mapped from [-1, 1] onto [0, 1]
+_GL_W = _GL_W / 2.0
+
+CHUNK = 65536  # segments per batch, keeps the (N, 16, 2) quadrature temporaries around 16MB
+
+
+def cubic_lengths(ctrl):
+	"""Arc lengths of cubic Beziers; ``ctrl`` has shape (N, 4, 2)."""
+	out = np.empty(len(ctrl))
+	t = _GL_T[None, :, None]
+	u = 1.0 - t
+	for i in range(0, len(ctrl), CHUNK):
+		c = ctrl[i : i + CHUNK]
+		d0 = (c[:, 1] - c[:, 0])[:, None, :]
+		d1 = (c[:, 2] - c[:, 1])[:, None, :]
+		d2 = (c[:, 3] - c[:, 2])[:, None, :]
+		deriv = 3.0 * (u * u * d0 + 2.0 * u * t * d1 + t * t * d2)
+		out[i : i + CHUNK] = np.hypot(deriv[..., 0], deriv[..., 1]) @ _GL_W
+	return out
+
+
+def line_lengths(ends):
+	"""Lengths of line segments; ``ends`` has shape (N, 2, 2)."""
+	d = ends[:, 1] - ends[:, 0]
+	return np.hypot(d[:, 0], d[:, 1])
+
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(h):
+	# splitmix64 finaliser; uint64 arithmetic wraps, which is what a hash wants
+	h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+	h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+	return h ^ (h >> np.uint64(31))
+
+
+def _row_hashes(ops, rows, k):
+	"""One uint64 per row of coordinates quantized to the 1/k grid, tagged with the item kind."""
+	q = np.rint(rows * k).astype(np.int64).view(np.uint64)
+	h = _mix(np.asarray(ops, dtype=np.uint64) + _GOLDEN)
+	for j in range(q.shape[1]):
+		h = _mix(h ^ q[:, j])
+	return h
+
+
+def _segment_hashes(ops, xy, pos, k):
+	"""Hash of each segment (ops 0 line / 1 cubic, xy zero padded to 8) at position ``pos`` in its
+	subpath; summed per subpath they give an order-dependent subpath hash."""
+	return _mix(_row_hashes(ops, xy, k) + np.asarray(pos).astype(np.uint64) * _GOLDEN)
+
+
+def _scoped(hashes, groups):
+	"""``hashes`` mixed with the group of each, so equal geometry only collides within a group."""
+	return _mix(hashes ^ _mix(np.asarray(groups).astype(np.uint64) + _GOLDEN))
+
+
+def _first_copies(hashes):
+	"""True where a hash appears for the first time, in order."""
+	first = np.zeros(len(hashes), dtype=bool)
+	first[np.unique(hashes, return_index=True)[1]] = True
+	return first
+
+
+def _closed_items(ops, xy):
+	"""(perimeters, dedupe rows) of rect (op 2, x0 y0 x1 y1) and quad (op 3, ul ur ll lr) items;
+	rect corners are normalised so a rect drawn from either corner dedupes alike."""
+	is_rect = ops == 2
+	r, q = xy[is_rect], xy[~is_rect]
+	lengths = np.empty(len(ops))
+	lengths[is_rect] = 2.0 * (np.abs(r[:, 2] - r[:, 0]) + np.abs(r[:, 3] - r[:, 1]))
+	# ul -> ur -> lr -> ll -> ul
+	lengths[~is_rect] = (
+		np.hypot(q[:, 2] - q[:, 0], q[:, 3] - q[:, 1])
+		+ np.hypot(q[:, 6] - q[:, 2], q[:, 7] - q[:, 3])
+		+ np.hypot(q[:, 4] - q[:, 6], q[:, 5] - q[:, 7])
+		+ np.hypot(q[:, 0] - q[:, 4], q[:, 1] - q[:, 5])
+	)
+	rows = xy.copy()
+	rows[is_rect] = np.hstack(
+		[np.minimum(r[:, 0:2], r[:, 2:4]), np.maximum(r[:, 0:2], r[:, 2:4]), np.zeros((len(r), 4))]
+	)
+	return lengths, rows
+
+
+class _SubpathTotals:
+	"""Per-subpath sums over segments flushed in batches, accumulated per group.
+
+	Subpath ids only ever grow, so at flush time every subpath but the newest is complete: those
+	are filtered and added to their group's total, and the newest carries over into the next batch.
+
+	With ``dedupe_k``, each subpath is hashed from its quantized segments (see ``_segment_hashes``)
+	and one whose hash was seen before in its group, in this batch or an earlier one, goes to group
+	``dup_g``.
+	"""
+
+	def __init__(self, min_subpath_len_pt, dedupe_k=0.0, dup_g=None):
+		self.min_len = min_subpath_len_pt
+		self.by_group = np.zeros(1)
+		self.base = 0  # subpath id of carry
+		self.carry = 0.0
+		self.k, self.dup_g = dedupe_k, dup_g
+		self.seen = np.empty(0, dtype=np.uint64)  # sorted hashes of every subpath and closed item counted
+		self.carry_h, self.carry_n = np.uint64(0), 0  # hash and segment count of the carried subpath so far
+
+	def _accumulate(self, groups, lengths):
+		sums = np.bincount(groups, weights=lengths, minlength=len(self.by_group)).astype(float, copy=False)
+		sums[: len(self.by_group)] += self.by_group
+		self.by_group = sums
+
+	def _duplicates(self, hashes):
+		dup = ~_first_copies(hashes) | np.isin(hashes, self.seen)
+		self.seen = np.union1d(self.seen, hashes)
+		return dup
+
+	def _subpath_hashes(self, sub, ops, xy, skip, n_subs):
+		firsts = np.flatnonzero(np.r_[True, sub[1:] != sub[:-1]])
+		pos = np.arange(len(sub)) - np.repeat(firsts, np.diff(np.r_[firsts, len(sub)]))
+		pos[sub == 0] += self.carry_n
+		seg_h = _segment_hashes(ops, xy, pos, self.k)
+		seg_h[skip] = 0
+		sub_h = np.zeros(n_subs, dtype=np.uint64)
+		sub_h[sub[firsts]] = np.add.reduceat(seg_h, firsts)
+		sub_h[0] += self.carry_h
+		last = sub == n_subs - 1
+		self.carry_n = int(last.sum()) + (self.carry_n if n_subs == 1 else 0)
+		return sub_h
+
+	def add(self, sub_ids, lengths, sub_groups, ops=None, xy=None, skip=None):
+		# sub_groups[k] is the group of subpath base + k, up to the newest one; ops / xy / skip (segments
+		# left out of the hash) are only needed when deduplicating
+		sub = np.asarray(sub_ids) - self.base
+		per_sub = np.bincount(sub, weights=lengths, minlength=len(sub_groups))
+		per_sub[0] += self.carry
+		done, groups = per_sub[:-1], np.asarray(sub_groups[:-1], dtype=np.intp)
+		keep = done >= self.min_len
+		if self.k:
+			sub_h = self._subpath_hashes(sub, ops, xy, skip, len(sub_groups))
+			kept = np.flatnonzero(keep)
+			groups[kept[self._duplicates(_scoped(sub_h[kept], groups[kept]))]] = self.dup_g
+			self.carry_h = sub_h[-1]
+		self._accumulate(groups[keep], done[keep])
+		self.base += len(sub_groups) - 1
+		self.carry = float(per_sub[-1])
+
+	def add_closed(self, ops, xy, groups):
+		"""Rect and quad items, each a closed subpath of its own."""
+		lengths, rows = _closed_items(ops, xy)
+		ok = lengths >= self.min_len
+		groups = groups[ok]
+		if self.k:
+			groups[self._duplicates(_scoped(_row_hashes(ops[ok], rows[ok], self.k), groups))] = self.dup_g
+		self._accumulate(groups, lengths[ok])
+
+	def finish(self, last_group):
+		if self.carry >= self.min_len:
+			if self.k and self._duplicates(_scoped(np.array([self.carry_h]), [last_group]))[0]:
+				last_group = self.dup_g
+			self._accumulate(np.array([last_group], dtype=np.intp), np.array([self.carry]))
+		return self.by_group
+
+
+def drawings_length_points(
+	drawings,
+	min_subpath_len_pt,
+	join_eps_pt=1e-3,
+	batch=CHUNK,
+	group=None,
+	dedupe_grid_pt=0.0,
+	duplicate_key=None,
+):
+	"""Total length of ``drawings`` (get_cdrawings() dicts or get_drawings() ones, points index alike).
+
+	With ``group``, returns {group(d): length} instead, still in a single pass. Segments are packed
+	and measured ``batch`` at a time, so memory stays flat however many paths a page holds.
+
+	With ``dedupe_grid_pt``, a subpath whose segments match an earlier one's on that grid is left
+	out of the total (credited to ``duplicate_key`` when grouping), as in ``api._drawing_length_points``.
+	The matching is done on the packed arrays, hashed as in ``packed_length_points``.
+	"""
+	keys, key_index = [], {}
+	dup_g = None
+	if dedupe_grid_pt:
+		# ungrouped, everything counted is group 0 and duplicates are group 1
+		dup_g = 1 if group is None else 0
+		if group is not None:
+			key_index[duplicate_key] = 0
+			keys.append(duplicate_key)
+	totals = _SubpathTotals(min_subpath_len_pt, 1.0 / dedupe_grid_pt if dedupe_grid_pt else 0.0, dup_g)
+	segs, seg_ops, seg_sub = [], [], []  # lines (op 0) zero padded to the 8 coordinates of a cubic (op 1)
+	closing = []  # indices into segs of closePath lines
+	boxes, box_ops, box_g = [], [], []  # rects (op 2) zero padded, quads (op 3)
+	sub_groups = []  # group of each subpath from totals.base onwards
+	g = 0
+	sub = -1
+
+	def flush():
+		# lines and cubics of one subpath can straddle a flush, so both go through the same batch
+		if segs:
+			ops = np.asarray(seg_ops, dtype=np.int8)
+			xy = np.asarray(segs, dtype=float)
+			is_line = ops == 0
+			lengths = np.empty(len(ops))
+			lengths[is_line] = line_lengths(xy[is_line, :4].reshape(-1, 2, 2))
+			lengths[~is_line] = cubic_lengths(xy[~is_line].reshape(-1, 4, 2))
+			skip = None
+			if dedupe_grid_pt:
+				# a closePath line that is zero length on the grid is not part of the outline's shape
+				cl = np.asarray(closing, dtype=np.intp)
+				qc = np.rint(xy[cl, :4] * totals.k)
+				skip = cl[(qc[:, 0] == qc[:, 2]) & (qc[:, 1] == qc[:, 3])]
+			totals.add(seg_sub, lengths, sub_groups, ops, xy, skip)
+			del sub_groups[:-1]
+		if boxes:
+			totals.add_closed(
+				np.asarray(box_ops, dtype=np.int8),
+				np.asarray(boxes, dtype=float),
+				np.asarray(box_g, dtype=np.intp),
+			)
+		for buf in (segs, seg_ops, seg_sub, closing, boxes, box_ops, box_g):
+			buf.clear()
+
+	for d in drawings:
+		if group is not None:
+			key = group(d)
+			g = key_index.get(key)
+			if g is None:
+				g = key_index[key] = len(keys)
+				keys.append(key)
+		cp = sp = None
+		for it in d.get("items") or ():
+			if not it:
+				continue
+			op = it[0]
+			try:
+				if op == "l" or op == "c":
+					p0 = it[1]
+					if cp is None or abs(cp[0] - p0[0]) > join_eps_pt or abs(cp[1] - p0[1]) > join_eps_pt:
+						sub += 1
+						sub_groups.append(g)
+						sp = p0
+					if op == "l":
+						p1 = it[2]
+						segs.append((p0[0], p0[1], p1[0], p1[1], 0, 0, 0, 0))
+						seg_ops.append(0)
+						cp = p1
+					else:
+						p1, p2, p3 = it[2], it[3], it[4]
+						segs.append((p0[0], p0[1], p1[0], p1[1], p2[0], p2[1], p3[0], p3[1]))
+						seg_ops.append(1)
+						cp = p3
+					seg_sub.append(sub)
+				elif op == "re":
+					r = it[1]
+					boxes.append((r[0], r[1], r[2], r[3], 0, 0, 0, 0))
+					box_ops.append(2)
+					box_g.append(g)
+				elif op == "qu":
+					ul, ur, ll, lr = it[1]
+					boxes.append((ul[0], ul[1], ur[0], ur[1], ll[0], ll[1], lr[0], lr[1]))
+					box_ops.append(3)
+					box_g.append(g)
+			except Exception:
+				continue
+		if d.get("closePath") and cp is not None and sp is not None:
+			closing.append(len(segs))
+			segs.append((cp[0], cp[1], sp[0], sp[1], 0, 0, 0, 0))
+			seg_ops.append(0)
+			seg_sub.append(sub)
+		if len(segs) + len(boxes) >= batch:
+			flush()
+
+	flush()
+	by_group = totals.finish(sub_groups[-1] if sub_groups else 0)
+	if group is None:
+		return float(by_group[0])
+	return {key: float(by_group[i]) for i, key in enumerate(keys) if i < len(by_group) and by_group[i]}
+
+
+def packed_length_points(
+	page, min_subpath_len_pt, join_eps_pt=1e-3, keep=None, group=None, dedupe_grid_pt=0.0, duplicate_key=None
+):
+	"""``drawings_length_points`` over a ``geometry_sidecar.PackedPage``, without a Python loop per item.
+
+	Subpath breaks, closePath segments and the minimum length filter are found with array
+	operations on the packed items; ``keep`` and ``group`` are still called once per drawing.
+	Duplicates are found by hashing each subpath's quantized segments in order (position mixed
+	in, then its group), then keeping the first subpath with each hash.
+	"""
+	ops, xy, owner = page.ops, page.xy, page.owner
+	attrs = page.drawing_attrs() if keep is not None or group is not None else None
+	if keep is not None:
+		kept = np.fromiter((keep(d) for d in attrs), dtype=bool, count=len(attrs))
+		m = kept[owner]
+		ops, xy, owner = ops[m], xy[m], owner[m]
+	keys, key_index = [], {}
+	gid = np.zeros(len(page.close), dtype=np.intp)  # group of each drawing
+	if group is not None:
+		for n, d in enumerate(attrs):
+			if keep is not None and not kept[n]:
+				continue
+			key = group(d)
+			g = key_index.get(key)
+			if g is None:
+				g = key_index[key] = len(keys)
+				keys.append(key)
+			gid[n] = g
+	n_groups = len(keys) if group is not None else 1
+	dup_g = None
+	if dedupe_grid_pt:
+		dup_g, n_groups = n_groups, n_groups + 1
+		if group is not None:
+			keys.append(duplicate_key)
+	k = 1.0 / dedupe_grid_pt if dedupe_grid_pt else 0.0
+	by_group = np.zeros(max(n_groups, 1))
+
+	seg = ops <= 1
+	s_ops, s_xy, s_owner = ops[seg], xy[seg], owner[seg]
+	if len(s_ops):
+		is_line = s_ops == 0
+		start = s_xy[:, 0:2]
+		end = np.where(is_line[:, None], s_xy[:, 2:4], s_xy[:, 6:8])
+		# a subpath starts with each drawing and wherever a segment leaves the current point
+		brk = np.ones(len(s_ops), dtype=bool)
+		brk[1:] = (
+			(s_owner[1:] != s_owner[:-1])
+			| (np.abs(start[1:, 0] - end[:-1, 0]) > join_eps_pt)
+			| (np.abs(start[1:, 1] - end[:-1, 1]) > join_eps_pt)
+		)
+		sub = np.cumsum(brk) - 1
+		lengths = np.empty(len(s_ops))
+		lengths[is_line] = line_lengths(s_xy[is_line, :4].reshape(-1, 2, 2))
+		lengths[~is_line] = cubic_lengths(s_xy[~is_line].reshape(-1, 4, 2))
+		per_sub = np.bincount(sub, weights=lengths)
+		# closePath: the last segment of a drawing joins back to the start of its subpath
+		last = np.ones(len(s_ops), dtype=bool)
+		last[:-1] = s_owner[1:] != s_owner[:-1]
+		last &= page.close[s_owner]
+		firsts = np.flatnonzero(brk)
+		if last.any():
+			back = end[last] - start[firsts[sub[last]]]
+			per_sub += np.bincount(
+				sub[last], weights=np.hypot(back[:, 0], back[:, 1]), minlength=len(per_sub)
+			)
+		sub_g = gid[s_owner[brk]]
+		ok = per_sub >= min_subpath_len_pt
+		if dup_g is not None:
+			# order-dependent subpath hash: each segment's hash mixed with its position, summed per subpath
+			pos = (np.arange(len(s_ops)) - firsts[sub]).astype(np.uint64)
+			seg_h = _segment_hashes(s_ops, s_xy, pos, k)
+			sub_h = np.add.reduceat(seg_h, firsts)
+			# the closePath segment counts as one more line, unless it is zero length on the grid
+			cl = np.flatnonzero(last)
+			closing = np.hstack([end[cl], start[firsts[sub[cl]]], np.zeros((len(cl), 4))])
+			qc = np.rint(closing[:, :4] * k)
+			cl_keep = (qc[:, 0] != qc[:, 2]) | (qc[:, 1] != qc[:, 3])
+			cl, closing = cl[cl_keep], closing[cl_keep]
+			n_seg = np.diff(np.append(firsts, len(s_ops))).astype(np.uint64)
+			sub_h[sub[cl]] += _segment_hashes(np.zeros(len(cl)), closing, n_seg[sub[cl]], k)
+			counted = np.flatnonzero(ok)
+			sub_g[counted[~_first_copies(_scoped(sub_h[counted], sub_g[counted]))]] = dup_g
+		by_group += np.bincount(sub_g[ok], weights=per_sub[ok], minlength=len(by_group))
+
+	box = ops >= 2
+	closed, rows = _closed_items(ops[box], xy[box])
+	ok = closed >= min_subpath_len_pt
+	closed_g = gid[owner[box][ok]]
+	if dup_g is not None and ok.any():
+		closed_g[~_first_copies(_scoped(_row_hashes(ops[box][ok], rows[ok], k), closed_g))] = dup_g
+	by_group += np.bincount(closed_g, weights=closed[ok], minlength=len(by_group))
+
+	if group is None:
+		return float(by_group[0])
+	return {key: float(by_group[i]) for i, key in enumerate(keys) if by_group[i]}
@@ -0,0 +1,77 @@
+"""Raster contour engine, for artwork that only exists as pixels.
+
+The page is rendered to an 8-bit grey pixmap and traced with marching squares at the
+``level`` ink coverage (0 paper, 1 ink). Crossing points are interpolated along each cell edge
+from the antialiased grey values, so an outline measures close to its true length rather
+than as a pixel staircase. Saddle cells are resolved by the cell's mean value.
+
+Only cells the contour passes through are gathered, and the image is walked ``BAND_ROWS``
+rows at a time, so the temporaries stay a few MB however large the render is. Pure NumPy;
+no OpenCV.
+
+Tolerance: antialiased edges trace to within about 1% of the true length. Hard-edged
+(bi-level) images read a few percent long, since the contour follows the pixel corners.
+What is traced is the edge of the ink, so a stroked line (one path to the vector engines)
+counts both of its sides.
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+BAND_ROWS = 256
+
+# cell edges: 0 top, 1 right, 2 bottom, 3 left; case bits: top-left 8, top-right 4, bottom-right 2,
+# bottom-left 1. One segment per case as a pair of edges; the saddles 5 and 10 are handled apart
+_E1 = np.array([0, 3, 2, 3, 0, 0, 0, 3, 3, 0, 0, 0, 3, 2, 3, 0])
+_E2 = np.array([0, 2, 1, 1, 1, 0, 2, 0, 0, 2, 0, 1, 1, 1, 2, 0])
+
+
+def _cells_length(block, level):
+	"""Contour length inside ``block`` (rows x cols of ink values), in pixels."""
+	inside = (block > level).view(np.uint8)
+	case = (inside[:-1, :-1] << 3) | (inside[:-1, 1:] << 2) | (inside[1:, 1:] << 1) | inside[1:, :-1]
+	rows, cols = np.nonzero((case != 0) & (case != 15))
+	if not len(rows):
+		return 0.0
+	c = case[rows, cols]
+	tl, tr = block[rows, cols], block[rows, cols + 1]
+	br, bl = block[rows + 1, cols + 1], block[rows + 1, cols]
+	zeros, ones = np.zeros_like(tl), np.ones_like(tl)
+	# where each edge is crossed, in cell coordinates; uncrossed edges are never read
+	with np.errstate(divide="ignore", invalid="ignore"):
+		ex = np.stack([(level - tl) / (tr - tl), ones, (level - bl) / (br - bl), zeros], axis=1)
+		ey = np.stack([zeros, (level - tr) / (br - tr), ones, (level - tl) / (bl - tl)], axis=1)
+
+	def seg(n, e1, e2):
+		return np.hypot(ex[n, e1] - ex[n, e2], ey[n, e1] - ey[n, e2])
+
+	n = np.arange(len(c))
+	length = seg(n, _E1[c], _E2[c])
+	s = np.flatnonzero((c == 5) | (c == 10))
+	if len(s):
+		# a saddle joins its inside corners when the cell's mean is inside, cutting off the outside ones
+		center_in = (tl[s] + tr[s] + br[s] + bl[s]) / 4 > level
+		joined_a = (c[s] == 5) ^ center_in  # top-right + left-bottom, else left-top + bottom-right
+		length[s] = np.where(joined_a, seg(s, 0, 1) + seg(s, 3, 2), seg(s, 3, 0) + seg(s, 2, 1))
+	return float(length.sum())
+
+
+def contour_length_px(gray, level=0.5, band_rows=BAND_ROWS, deadline=None):
+	"""Length in pixels of the outlines in ``gray`` (H x W uint8, 0 black .. 255 white).
+
+	Outside the image counts as paper, so shapes running off the edge are closed along it.
+	Raises TimeoutError once ``deadline`` (a perf_counter() value) has passed.
+	"""
+	h, w = gray.shape
+	hp = h + 2  # one row of paper above and below; padded row p is image row p - 1
+	total = 0.0
+	for top in range(0, hp - 1, band_rows):
+		bottom = min(top + band_rows + 1, hp)  # bands overlap by a row: a cell needs the row below it
+		lo, hi = max(top - 1, 0), min(bottom - 1, h)
+		block = np.zeros((bottom - top, w + 2), dtype=np.float32)
+		block[lo + 1 - top : hi + 1 - top, 1:-1] = 1.0 - gray[lo:hi] / np.float32(255.0)
+		total += _cells_length(block, level)
+		if deadline is not None and perf_counter() > deadline:
+			raise TimeoutError
+	return total
@@ -34,12 +34,33 @@ frappe.ui.form.on('Quotation', {
                             return;
                         }
 
+                        // measured in a background job so large files don't tie up a web worker
                         const res = await frappe.call({
-                            method: 'silicon_signs.api.calculate_perimeter',
+                            method: 'silicon_signs.api.enqueue_perimeter',
                             args: { file_url }
                         });
+                        let job = res.message || {};
+                        if (job.status !== 'done' && job.job_id) {
+                            job = await wait_for_perimeter(job.job_id);
+                        }
+                        if (job.status === 'failed') {
+                            frappe.msgprint(job.error || __('Could not calculate perimeter.'));
+                            return;
+                        }
 
-                        const perimeter = res.message?.perimeter_inches;
+                        const perimeter = job.result?.perimeter_inches;
+                        if (job.result?.source === 'raster') {
+                            frappe.show_alert({
+                                message: __('No vector outlines found; traced from the image at {0} dpi. Please check the result.', [job.result.dpi]),
+                                indicator: 'orange'
+                            });
+                        }
+                        if (job.result?.duplicate_inches) {
+                            frappe.show_alert({
+                                message: __('Skipped {0} in of duplicate outlines', [job.result.duplicate_inches]),
+                                indicator: 'orange'
+                            });
+                        }
                         if (perimeter) {
                             if (attr_fg) {
                                 await attr_fg.set_value('attr__perimeter_inches', perimeter);
@@ -84,109 +105,24 @@ frappe.ui.form.on('Quotation', {
                         });
 
                         const template = vals.sign_template;
-                        console.log("the vals", vals)
 
-                        // 2) Compute a “random-ish” price (replace with your logic anytime)
-                        const av = attr_fg.get_values();
+                        // 2) Price, find/create the variant, upsert its Item Price and add the row
+                        //    in one server-side transaction; save first so the server sees our edits
+                        if (frm.is_new() || frm.is_dirty()) await frm.save();
 
-
-                        const pr = await frappe.call({
-                            method: 'silicon_signs.silicon_signs.doctype.sign_pricing_template.api.price_item_by_attributes',
+                        const r = await frappe.call({
+                            method: 'silicon_signs.silicon_signs.doctype.sign_pricing_template.api.configure_and_add_variant',
                             args: {
+                                quotation: frm.doc.name,
                                 item_template: template,
                                 attributes: attr_args
-                            }
+                            },
+                            freeze: true
                         });
-                        const { price, breakdown } = pr.message || {};
-
-                        // 3) Find or create the variant
-                        const getResp = await frappe.call({
-                            method: 'erpnext.controllers.item_variant.get_variant',
-                            args: { template, args: attr_args }
-                        });
-                        let item_code = getResp && getResp.message ? getResp.message : null;
-
-                        if (!item_code) {
-                            const createResp = await frappe.call({
-                                method: 'erpnext.controllers.item_variant.create_variant',
-                                args: { item: template, args: attr_args }
-                            });
-                            item_code = createResp && createResp.message
-                                ? (createResp.message.name || createResp.message.item_code || createResp.message)
-                                : null;
-                        }
+                        const { item_code, price, currency } = r.message || {};
                         if (!item_code) frappe.throw(__('Could not determine the created variant Item Code.'));
 
-                        // 4) Upsert Item Price for the quotation’s selling price list
-                        const price_list = frm.doc.selling_price_list || 'Standard Selling';
-                        const currency = frm.doc.currency || (frappe.boot && frappe.boot.sysdefaults && frappe.boot.sysdefaults.currency) || 'USD';
-
-                        // Try to read UOM for Item Price
-
-
-                        // Check for existing Item Price
-                        let existingPrice = null;
-                        try {
-                            const res = await frappe.db.get_list('Item Price', {
-                                fields: ['name', 'price_list_rate'],
-                                filters: { item_code, price_list },
-                                limit: 1
-                            });
-                            existingPrice = (res && res.length) ? res[0] : null;
-                        } catch (e) { /* ignore */ }
-
-                        if (existingPrice) {
-                            await frappe.call({
-                                method: 'frappe.client.set_value',
-                                args: {
-                                    doctype: 'Item Price',
-                                    name: existingPrice.name,
-                                    fieldname: 'price_list_rate',
-                                    value: price
-                                }
-                            });
-                        } else {
-                            await frappe.call({
-                                method: 'frappe.client.insert',
-                                args: {
-                                    doc: {
-                                        doctype: 'Item Price',
-                                        item_code,
-                                        price_list,
-                                        price_list_rate: price,
-                                        currency,
-                                        uom: "Nos",
-                                        selling: 1
-                                    }
-                                }
-                            });
-                        }
-
-                        // 5) Add to Quotation items and save
-                        const grid = frm.get_field('items').grid;
-
-                        // Try to reuse the last row if it's empty
-                        let row = (frm.doc.items || []).slice(-1)[0];
-                        const is_empty = row && !row.item_code && !row.item_name && !row.description;
-
-                        if (!row || !is_empty) {
-                            // No empty tail row → create one
-                            row = frm.add_child('items');
-                        }
-
-                        // Set values via model.set_value to trigger fetches and child validations
-                        await frappe.model.set_value(row.doctype, row.name, 'item_code', item_code);
-                        await frappe.model.set_value(row.doctype, row.name, 'qty', 1);
-                        await frappe.model.set_value(row.doctype, row.name, 'uom', 'Nos');
-                        await frappe.model.set_value(row.doctype, row.name, 'rate', price);
-
-                        // (Optional) if you also want item_name explicitly:
-                        // await frappe.model.set_value(row.doctype, row.name, 'item_name', item_code);
-
-                        await frm.refresh_field('items');
-
-                        // optional: persist now so the new row + pricing is saved immediately
-                        await frm.save();
+                        await frm.reload_doc();
 
                         const price_formatted = frappe.format(price, { fieldtype: 'Currency', options: currency });
                         frappe.msgprint(__('Item Variant {0} added with price {1}.', [item_code.bold(), price_formatted]));
@@ -211,8 +147,8 @@ frappe.ui.form.on('Quotation', {
                 if (!template) return;
 
                 try {
-                    const item = await frappe.db.get_doc('Item', template);
-                    const attrs = (item && item.attributes) ? item.attributes : [];
+                    const bundle = await get_attribute_bundle(template);
+                    const attrs = (bundle && bundle.attributes) || [];
 
                     // Prepare container for FieldGroup
                     const holder = dialog.get_field('attrs_html').$wrapper.empty();
@@ -225,8 +161,7 @@ frappe.ui.form.on('Quotation', {
                         const attr_name = row.attribute;
                         if (!attr_name) continue;
 
-                        const attrDoc = await frappe.db.get_doc('Item Attribute', attr_name);
-                        const options = (attrDoc && attrDoc.item_attribute_values || []).map(v => v.attribute_value);
+                        const options = row.values || [];
 
                         const scrub = (s) => (frappe.scrub ? frappe.scrub(s) : (s || '').toString().toLowerCase().replace(/\W+/g, '_'));
                         const fname = 'attr__' + scrub(attr_name);
@@ -240,9 +175,7 @@ frappe.ui.form.on('Quotation', {
                             reqd: 1
                         });
                         colCounter++;
-                        console.log("counter", colCounter)
                         if (colCounter % 2 === 1) {
-                            console.log("adding col")
                             fields.push({ fieldtype: 'Column Break' });
                         } else {
                             // after the 2nd field in the row, start a new row
@@ -268,6 +201,50 @@ frappe.ui.form.on('Quotation', {
                 }
             }
 
+            // Attribute metadata for a template: kept in localStorage with the server's etag,
+            // so reopening the dialog only re-downloads it after the template or its attributes change.
+            async function get_attribute_bundle(template) {
+                const key = `silicon_signs:template_attributes:${template}`;
+                let held = null;
+                try { held = JSON.parse(localStorage.getItem(key)); } catch (e) { held = null; }
+
+                const r = await frappe.call({
+                    method: 'silicon_signs.silicon_signs.doctype.sign_pricing_template.api.get_template_attributes',
+                    args: { item_template: template, if_none_match: held ? held.etag : null }
+                });
+                const bundle = r.message || {};
+                if (bundle.not_modified && held) return held;
+                try { localStorage.setItem(key, JSON.stringify(bundle)); } catch (e) { /* storage full or disabled */ }
+                return bundle;
+            }
+
+            // Resolves with the final job status; realtime drives the progress bar,
+            // polling guarantees completion is seen even without a socket connection.
+            function wait_for_perimeter(job_id) {
+                return new Promise((resolve) => {
+                    const title = __('Calculating Perimeter');
+                    const on_progress = (data) => {
+                        if (data.job_id !== job_id || !data.pages) return;
+                        frappe.show_progress(title, data.page, data.pages, __('Page {0} of {1}', [data.page, data.pages]));
+                    };
+                    const finish = (data) => {
+                        clearInterval(timer);
+                        frappe.realtime.off('perimeter_progress', on_progress);
+                        frappe.hide_progress();
+                        resolve(data);
+                    };
+                    const timer = setInterval(async () => {
+                        const r = await frappe.call({
+                            method: 'silicon_signs.api.get_perimeter_job',
+                            args: { job_id }
+                        });
+                        const data = r.message || {};
+                        if (['done', 'failed', 'unknown'].includes(data.status)) finish(data);
+                    }, 1500);
+                    frappe.realtime.on('perimeter_progress', on_progress);
+                });
+            }
+
             function flt(v) { return parseFloat(v || 0) || 0; }
             function cint(v) { return parseInt(v || 0, 10) || 0; }
         });
@@ -0,0 +1,8 @@
+// Copyright (c) 2025, mohammedkashalo@gmail.com and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Perimeter Cache", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,108 @@
+# Copyright (c) 2025, mohammedkashalo@gmail.com and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+import os
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_to_date, cint, get_datetime, now_datetime
+
+# max rows kept before least-recently-used entries are evicted (site_config: perimeter_cache_max_entries)
+DEFAULT_MAX_ENTRIES = 2000
+# a file's (path, size, mtime) -> sha256 memo; a changed file gets a new stamp, so old ones just expire
+FILE_HASH_TTL = 24 * 3600
+# a hit only writes last_accessed (and hits) when the stored stamp is older than this, so warm hits are
+# read-only; LRU order is then accurate to this many minutes, and hits counts stamped accesses
+ACCESS_STAMP_MINUTES = 10
+
+
+class PerimeterCache(Document):
+	pass
+
+
+def file_content_hash(path):
+	"""sha256 of the file bytes, memoised in redis on (path, size, mtime) so repeat lookups skip the read."""
+	st = os.stat(path)
+	stamp = f"{path}:{st.st_size}:{st.st_mtime_ns}"
+	key = f"perimeter_file_sha256:{hashlib.sha256(stamp.encode()).hexdigest()}"
+	cached = frappe.cache().get_value(key)
+	if cached:
+		return cached
+
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			h.update(chunk)
+	digest = h.hexdigest()
+	frappe.cache().set_value(key, digest, expires_in_sec=FILE_HASH_TTL)
+	return digest
+
+
+def make_cache_key(content_hash, knobs):
+	"""Stable key over the file content and every knob that changes the measured result."""
+	payload = json.dumps({"content_hash": content_hash, **knobs}, sort_keys=True, default=str)
+	return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached_result(cache_key):
+	row = frappe.db.get_value("Perimeter Cache", cache_key, ["result", "hits", "last_accessed"], as_dict=True)
+	if not row or not row.result:
+		return None
+
+	now = now_datetime()
+	if not row.last_accessed or get_datetime(row.last_accessed) < add_to_date(
+		now, minutes=-ACCESS_STAMP_MINUTES
+	):
+		frappe.db.set_value(
+			"Perimeter Cache",
+			cache_key,
+			{"hits": cint(row.hits) + 1, "last_accessed": now},
+			update_modified=False,
+		)
+	return frappe.parse_json(row.result)
+
+
+def set_cached_result(cache_key, content_hash, knobs, result):
+	frappe.get_doc(
+		{
+			"doctype": "Perimeter Cache",
+			"cache_key": cache_key,
+			"content_hash": content_hash,
+			"only_visible": cint(knobs.get("only_visible")),
+			"bez_tol_pt": knobs.get("bez_tol_pt"),
+			"min_subpath_len_pt": knobs.get("min_subpath_len_pt"),
+			"perimeter_inches": result.get("perimeter_inches"),
+			"perimeter_lf": result.get("perimeter_lf"),
+			"source": result.get("source"),
+			"last_accessed": now_datetime(),
+			"result": json.dumps(result),
+		}
+	).insert(ignore_permissions=True, ignore_if_duplicate=True)
+	evict_lru()
+
+
+def evict_lru(max_entries=None):
+	"""Drop the least recently accessed rows once the table grows past its bound."""
+	max_entries = cint(max_entries or frappe.conf.get("perimeter_cache_max_entries") or DEFAULT_MAX_ENTRIES)
+	excess = frappe.db.count("Perimeter Cache") - max_entries
+	if excess <= 0:
+		return
+
+	stale = frappe.get_all(
+		"Perimeter Cache", fields=["name", "content_hash"], order_by="last_accessed asc", limit=excess
+	)
+	if not stale:
+		return
+	frappe.db.delete("Perimeter Cache", {"name": ("in", [r.name for r in stale])})
+
+	# a file no longer cached under any knobs doesn't need its geometry sidecar either
+	hashes = {r.content_hash for r in stale if r.content_hash}
+	if hashes:
+		from silicon_signs.geometry_sidecar import remove_sidecars
+
+		still_cached = frappe.get_all(
+			"Perimeter Cache", filters={"content_hash": ("in", list(hashes))}, pluck="content_hash"
+		)
+		remove_sidecars(hashes - set(still_cached))
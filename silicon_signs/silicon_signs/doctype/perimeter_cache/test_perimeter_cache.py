@@ -0,0 +1,91 @@
+# Copyright (c) 2025, mohammedkashalo@gmail.com and Contributors
+# See license.txt
+
+import os
+import tempfile
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, now_datetime
+
+from silicon_signs.geometry_sidecar import sidecar_path
+from silicon_signs.silicon_signs.doctype.perimeter_cache.perimeter_cache import (
+	evict_lru,
+	file_content_hash,
+	get_cached_result,
+	make_cache_key,
+	set_cached_result,
+)
+
+KNOBS = {"only_visible": 0, "bez_tol_pt": 0.25, "min_subpath_len_pt": 0.75, "engine": "python"}
+
+
+def cache_entry(content_hash, knobs=KNOBS, inches=1.0, last_accessed=None):
+	key = make_cache_key(content_hash, knobs)
+	set_cached_result(key, content_hash, knobs, {"perimeter_inches": inches, "source": "vector"})
+	if last_accessed:
+		frappe.db.set_value("Perimeter Cache", key, "last_accessed", last_accessed, update_modified=False)
+	return key
+
+
+class TestPerimeterCache(FrappeTestCase):
+	def test_miss_then_hit(self):
+		key = make_cache_key("_test_hit", KNOBS)
+		self.assertIsNone(get_cached_result(key))
+
+		cache_entry("_test_hit", inches=12.5)
+		self.assertEqual(get_cached_result(key)["perimeter_inches"], 12.5)
+
+	def test_warm_hit_is_read_only(self):
+		key = cache_entry("_test_read_only")
+		# stamped on insert, so a hit right after is a single SELECT and nothing is written
+		with self.assertQueryCount(1):
+			get_cached_result(key)
+		self.assertEqual(frappe.db.get_value("Perimeter Cache", key, "hits"), 0)
+
+		# a stale stamp is refreshed, which keeps the LRU order
+		frappe.db.set_value(
+			"Perimeter Cache",
+			key,
+			"last_accessed",
+			add_to_date(now_datetime(), days=-1),
+			update_modified=False,
+		)
+		get_cached_result(key)
+		self.assertEqual(frappe.db.get_value("Perimeter Cache", key, "hits"), 1)
+
+	def test_changed_file_or_knobs_miss(self):
+		with tempfile.NamedTemporaryFile("wb", suffix=".pdf", delete=False) as f:
+			f.write(b"%PDF-1.4 first")
+		try:
+			before = file_content_hash(f.name)
+			self.assertEqual(file_content_hash(f.name), before)
+			key = cache_entry(before)
+
+			with open(f.name, "wb") as g:
+				g.write(b"%PDF-1.4 second version")
+			after = file_content_hash(f.name)
+			self.assertNotEqual(after, before)
+			self.assertIsNone(get_cached_result(make_cache_key(after, KNOBS)))
+			self.assertIsNone(get_cached_result(make_cache_key(before, {**KNOBS, "only_visible": 1})))
+			self.assertIsNotNone(get_cached_result(key))
+		finally:
+			os.remove(f.name)
+
+	def test_evict_lru_drops_oldest_rows_and_their_sidecars(self):
+		oldest = cache_entry("_test_evict_a", last_accessed="2000-01-01 00:00:00")
+		older = cache_entry("_test_evict_b", last_accessed="2000-01-02 00:00:00")
+		# the same file under other knobs, accessed later: its sidecar must survive
+		cache_entry("_test_evict_b", {**KNOBS, "only_visible": 1}, last_accessed="2000-01-03 00:00:00")
+		for content_hash in ("_test_evict_a", "_test_evict_b"):
+			os.makedirs(os.path.dirname(sidecar_path(content_hash)), exist_ok=True)
+			open(sidecar_path(content_hash), "wb").close()
+
+		evict_lru(max_entries=frappe.db.count("Perimeter Cache") - 2)
+
+		self.assertFalse(frappe.db.exists("Perimeter Cache", oldest))
+		self.assertFalse(frappe.db.exists("Perimeter Cache", older))
+		self.assertTrue(frappe.db.exists("Perimeter Cache", {"content_hash": "_test_evict_b"}))
+		self.assertFalse(os.path.exists(sidecar_path("_test_evict_a")))
+		self.assertTrue(os.path.exists(sidecar_path("_test_evict_b")))
+		os.remove(sidecar_path("_test_evict_b"))
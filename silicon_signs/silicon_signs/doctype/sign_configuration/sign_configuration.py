@@ -1,6 +1,9 @@
 # Copyright (c) 2025, mohammedkashalo@gmail.com and contributors
 # For license information, please see license.txt
 
+import hashlib
+import json
+
 import frappe
 from frappe import _
 from frappe.utils import flt, cint
@@ -23,14 +26,34 @@ class SignConfiguration(Document):
 
     def on_submit(self):
         """Calculate pricing and create BOM when Sign Configuration is submitted"""
-        self.calculate_pricing()
-        self.update_quotation_item()
-        self.create_bom()
-        
-    def calculate_pricing(self):
+        ctx = get_pricing_context()
+        if self.flags.in_bulk_submit:
+            # bulk_submit_sign_configurations updates each Quotation once and builds BOMs in a job
+            self.calculate_pricing(ctx)
+            self.db_set("calculated_rate", self.calculated_rate)
+            return
+
+        quotation = frappe.get_doc("Quotation", self.quotation)
+        quotation_item = self.get_quotation_item(quotation)
+
+        self.calculate_pricing(ctx)
+        self.update_quotation_item(quotation, quotation_item)
+        self.create_bom(ctx, quotation_item)
+
+        # on_submit runs after the row is written, so persist both results in a single update
+        self.db_set({"calculated_rate": self.calculated_rate, "bom_reference": self.bom_reference})
+
+    def get_quotation_item(self, quotation):
+        for row in quotation.items:
+            if row.name == self.quotation_item:
+                return row
+        frappe.throw(_("Quotation Item {0} not found in Quotation {1}").format(self.quotation_item, self.quotation))
+
+    def calculate_pricing(self, ctx=None):
         """Calculate the pricing based on configuration options"""
         # Get pricing rates from Pricing Settings
-        pricing_settings = frappe.get_doc("Pricing Settings")
+        ctx = ctx or get_pricing_context()
+        pricing_settings = ctx.settings
         
         base_cost = 0
         
@@ -52,7 +75,7 @@ class SignConfiguration(Document):
             # Try to get LED cost from Item Price first, fall back to Pricing Settings
             led_item = pricing_settings.led_item
             if led_item:
-                led_rate = self.get_item_price(led_item) or pricing_settings.led_cost_per_unit or 1.5
+                led_rate = ctx.item_rate(led_item) or pricing_settings.led_cost_per_unit or 1.5
             else:
                 led_rate = pricing_settings.led_cost_per_unit or 1.5
             base_cost += self.led_count * led_rate
@@ -62,7 +85,7 @@ class SignConfiguration(Document):
             # Try to get sheet cost from Item Price first, fall back to Pricing Settings
             sheet_item = pricing_settings.sheet_item
             if sheet_item:
-                sheet_rate = self.get_item_price(sheet_item) or pricing_settings.sheet_cost or 85.0
+                sheet_rate = ctx.item_rate(sheet_item) or pricing_settings.sheet_cost or 85.0
             else:
                 sheet_rate = pricing_settings.sheet_cost or 85.0
             base_cost += self.sheet_count * sheet_rate
@@ -122,9 +145,9 @@ class SignConfiguration(Document):
         profit_margin = pricing_settings.profit_margin or 0.3  # 30%
         final_price = base_cost * (1 + profit_margin)
         
-        # Update the calculated rate
+        # Update the calculated rate (persisted by on_submit)
         self.calculated_rate = final_price
-        self.save()
+        return final_price
 
     def get_item_price(self, item_code):
         """Get the selling price for an item"""
@@ -133,26 +156,26 @@ class SignConfiguration(Document):
                                    "price_list_rate")
         return price
 
-    def update_quotation_item(self):
+    def update_quotation_item(self, quotation=None, quotation_item=None):
         """Update the Quotation Item with the calculated rate"""
-        quotation_item = frappe.get_doc("Quotation Item", self.quotation_item)
+        quotation = quotation or frappe.get_doc("Quotation", self.quotation)
+        quotation_item = quotation_item or self.get_quotation_item(quotation)
         quotation_item.rate = self.calculated_rate
         quotation_item.amount = self.calculated_rate * self.quantity
-        quotation_item.save()
-        
-        # Recalculate quotation totals
-        quotation = frappe.get_doc("Quotation", self.quotation)
+
+        # Recalculate quotation totals; saving the parent writes the item row too
         quotation.calculate_totals()
         quotation.save()
 
-    def create_bom(self):
+    def create_bom(self, ctx=None, quotation_item=None):
         """Create a Bill of Materials based on the sign configuration"""
         # Get the item code from the quotation item
-        quotation_item = frappe.get_doc("Quotation Item", self.quotation_item)
+        quotation_item = quotation_item or frappe.get_doc("Quotation Item", self.quotation_item)
         item_code = quotation_item.item_code
-        
+
         # Get pricing settings for item references
-        pricing_settings = frappe.get_doc("Pricing Settings")
+        ctx = ctx or get_pricing_context()
+        pricing_settings = ctx.settings
         
         # Create a new BOM
         bom = frappe.new_doc("BOM")
@@ -209,7 +232,7 @@ class SignConfiguration(Document):
                 bom.append("operations", {
                     "operation": pricing_settings.bending_operation,
                     "time_in_mins": self.perimeter_inches * 0.5,  # 0.5 minutes per inch
-                    "hour_rate": frappe.db.get_value("Operation", pricing_settings.bending_operation, "hour_rate") or 30
+                    "hour_rate": ctx.operation_rate(pricing_settings.bending_operation) or 30
                 })
             
             # Routing labor
@@ -217,15 +240,78 @@ class SignConfiguration(Document):
                 bom.append("operations", {
                     "operation": pricing_settings.routing_operation,
                     "time_in_mins": self.perimeter_inches * 0.3,  # 0.3 minutes per inch
-                    "hour_rate": frappe.db.get_value("Operation", pricing_settings.routing_operation, "hour_rate") or 25
+                    "hour_rate": ctx.operation_rate(pricing_settings.routing_operation) or 25
                 })
-        
+
+        # Identical configurations produce identical BOMs: link the submitted one instead of adding another
+        fingerprint = bom_fingerprint(bom)
+        existing = frappe.db.get_value("BOM",
+                                       {"custom_sign_fingerprint": fingerprint, "docstatus": 1, "is_active": 1},
+                                       "name")
+        if existing:
+            self.bom_reference = existing
+            return existing
+
+        bom.custom_sign_fingerprint = fingerprint
         bom.insert()
         bom.submit()
-        
-        # Update the BOM reference in the Sign Configuration
+
+        # Update the BOM reference in the Sign Configuration (persisted by on_submit)
         self.bom_reference = bom.name
-        self.save()
+        return bom.name
+
+
+def bom_fingerprint(bom):
+    """sha256 over the BOM's company, item, materials and operations (order-independent, rounded quantities)."""
+    payload = {
+        # BOMs are per company: an identical BOM submitted under another company must not be reused
+        "company": bom.company,
+        "item": bom.item,
+        "quantity": flt(bom.quantity, 6),
+        "uom": bom.uom,
+        "items": sorted((d.item_code, flt(d.qty, 6), d.uom or "") for d in bom.items),
+        "operations": sorted((d.operation, flt(d.time_in_mins, 6), flt(d.hour_rate, 6)) for d in bom.operations),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class PricingContext:
+    """Pricing Settings plus every Item Price and Operation rate a submit needs, fetched once."""
+
+    def __init__(self):
+        # cached single: invalidated by frappe whenever Pricing Settings is saved
+        self.settings = frappe.get_cached_doc("Pricing Settings")
+        s = self.settings
+
+        self.item_rates = {}
+        items = [i for i in (s.led_item, s.sheet_item) if i]
+        if items:
+            for row in frappe.get_all("Item Price",
+                                      filters={"item_code": ["in", items], "selling": 1},
+                                      fields=["item_code", "price_list_rate"],
+                                      order_by="modified desc"):
+                self.item_rates.setdefault(row.item_code, row.price_list_rate)
+
+        self.operation_rates = {}
+        operations = [o for o in (s.bending_operation, s.routing_operation) if o]
+        if operations:
+            self.operation_rates = dict(frappe.get_all("Operation",
+                                                       filters={"name": ["in", operations]},
+                                                       fields=["name", "hour_rate"],
+                                                       as_list=True))
+
+    def item_rate(self, item_code):
+        return self.item_rates.get(item_code)
+
+    def operation_rate(self, operation):
+        return self.operation_rates.get(operation)
+
+
+def get_pricing_context():
+    """One PricingContext per request, shared by every Sign Configuration submitted in it."""
+    if not getattr(frappe.local, "sign_pricing_context", None):
+        frappe.local.sign_pricing_context = PricingContext()
+    return frappe.local.sign_pricing_context
 
 
 # Create a whitelisted function to create sign configuration from quotation
@@ -235,4 +321,86 @@ def create_sign_configuration(quotation, quotation_item):
     doc = frappe.new_doc("Sign Configuration")
     doc.quotation = quotation
     doc.quotation_item = quotation_item
-    return doc
\ No newline at end of file
+    return doc
+
+
+BOM_CHUNK_SIZE = 20
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_submit_sign_configurations(names):
+    """Submit many Sign Configurations: price them with one shared context, update every affected
+    Quotation once, then create the BOMs in a background job."""
+    names = frappe.parse_json(names) if isinstance(names, str) else (names or [])
+    docs = [frappe.get_doc("Sign Configuration", name) for name in names]
+    for doc in docs:
+        doc.check_permission("submit")
+        if doc.docstatus != 0:
+            frappe.throw(_("Sign Configuration {0} is not a draft").format(doc.name))
+
+    get_pricing_context()
+    by_quotation = {}
+    for doc in docs:
+        doc.flags.in_bulk_submit = True
+        doc.submit()
+        by_quotation.setdefault(doc.quotation, []).append(doc)
+
+    for quotation_name, configs in by_quotation.items():
+        quotation = frappe.get_doc("Quotation", quotation_name)
+        rows = {row.name: row for row in quotation.items}
+        for doc in configs:
+            row = rows.get(doc.quotation_item)
+            if not row:
+                frappe.throw(_("Quotation Item {0} not found in Quotation {1}").format(doc.quotation_item, quotation_name))
+            row.rate = doc.calculated_rate
+            row.amount = doc.calculated_rate * doc.quantity
+        quotation.calculate_totals()
+        quotation.save()
+
+    job_id = frappe.generate_hash(length=12)
+    frappe.enqueue(
+        "silicon_signs.silicon_signs.doctype.sign_configuration.sign_configuration.create_boms_for_configurations",
+        queue="long",
+        enqueue_after_commit=True,
+        token=job_id,
+        names=[doc.name for doc in docs],
+        user=frappe.session.user,
+    )
+    return {"submitted": len(docs), "quotations": list(by_quotation), "bom_job": job_id}
+
+
+def create_boms_for_configurations(token, names, user=None):
+    """Background half of the bulk submit: one BOM per configuration, committed in chunks."""
+    ctx = get_pricing_context()
+    # the user is kept with the progress: only they (or a System Manager) may read it back
+    progress = {"bom_job": token, "done": 0, "total": len(names), "failed": [], "user": user}
+    for start in range(0, len(names), BOM_CHUNK_SIZE):
+        for name in names[start:start + BOM_CHUNK_SIZE]:
+            doc = frappe.get_doc("Sign Configuration", name)
+            if doc.bom_reference:
+                progress["done"] += 1
+                continue
+            frappe.db.savepoint("sign_configuration_bom")
+            try:
+                quotation_item = frappe.db.get_value("Quotation Item", doc.quotation_item,
+                                                     ["item_code", "uom"], as_dict=True)
+                doc.create_bom(ctx, quotation_item)
+                doc.db_set("bom_reference", doc.bom_reference)
+            except Exception:
+                frappe.db.rollback(save_point="sign_configuration_bom")
+                frappe.log_error(f"BOM creation failed for Sign Configuration {name}", "Sign Configuration Bulk Submit")
+                progress["failed"].append(name)
+            progress["done"] += 1
+        frappe.db.commit()  # nosemgrep: background job, each chunk of BOMs is kept once built
+        frappe.cache().set_value(f"sign_configuration_bulk:{token}", progress, expires_in_sec=3600)
+        frappe.publish_realtime("sign_configuration_bulk_progress", progress, user=user)
+    return progress
+
+
+@frappe.whitelist()
+def get_bulk_submit_progress(bom_job):
+    progress = frappe.cache().get_value(f"sign_configuration_bulk:{bom_job}")
+    if not progress or (progress.get("user") != frappe.session.user and "System Manager" not in frappe.get_roles()):
+        return {"bom_job": bom_job, "done": 0}
+    return progress
+
@@ -0,0 +1,43 @@
+frappe.listview_settings["Sign Configuration"] = {
+	onload(listview) {
+		listview.page.add_actions_menu_item(__("Bulk Submit"), () => {
+			const names = listview.get_checked_items(true);
+			if (!names.length) return;
+
+			frappe.call({
+				method: "silicon_signs.silicon_signs.doctype.sign_configuration.sign_configuration.bulk_submit_sign_configurations",
+				args: { names },
+				freeze: true,
+				callback(r) {
+					const { submitted, bom_job } = r.message || {};
+					frappe.show_alert(__("{0} Sign Configurations submitted, creating BOMs", [submitted]));
+					listview.refresh();
+
+					const method = "silicon_signs.silicon_signs.doctype.sign_configuration.sign_configuration";
+					let last_event = Date.now();
+					let poller = null;
+					const on_progress = (data) => {
+						if (!poller || data.bom_job !== bom_job || !data.total) return;
+						last_event = Date.now();
+						frappe.show_progress(__("Creating BOMs"), data.done, data.total);
+						if (data.done >= data.total) {
+							frappe.hide_progress();
+							frappe.realtime.off("sign_configuration_bulk_progress", on_progress);
+							clearInterval(poller);
+							poller = null;
+							if (data.failed.length) {
+								frappe.msgprint(__("BOM creation failed for: {0}", [data.failed.join(", ")]));
+							}
+						}
+					};
+					frappe.realtime.on("sign_configuration_bulk_progress", on_progress);
+					// realtime events are lost when the socket drops; poll the stored progress once they stall
+					poller = setInterval(() => {
+						if (Date.now() - last_event < 10000) return;
+						frappe.xcall(`${method}.get_bulk_submit_progress`, { bom_job }).then(on_progress);
+					}, 5000);
+				},
+			});
+		});
+	},
+};
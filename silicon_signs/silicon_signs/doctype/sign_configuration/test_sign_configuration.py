@@ -1,9 +1,61 @@
 # Copyright (c) 2025, mohammedkashalo@gmail.com and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from silicon_signs.silicon_signs.doctype.sign_configuration.sign_configuration import get_pricing_context
+from silicon_signs.tests.utils import fake_pricing_context
+
+# queries for a cold PricingContext once Pricing Settings is cached: the Item Prices and the Operations
+CONTEXT_QUERY_BUDGET = 2
+
 
 class TestSignConfiguration(FrappeTestCase):
-	pass
+	def test_calculate_pricing_runs_without_queries(self):
+		doc = frappe.new_doc("Sign Configuration")
+		doc.update(
+			{
+				"perimeter_inches": 120,
+				"led_count": 40,
+				"sheet_count": 2,
+				"paint_returns": 1,
+				"trim_cap": 0,
+				"raceway_wireway_backer": 0,
+				"vinyl_rta": 0,
+				"vinyl_printed": 0,
+				"crating_fee": 0,
+				"lighting_type": "Face-lit",
+				"mounting_type": "Flush",
+			}
+		)
+		ctx = fake_pricing_context({"led_item": "LED", "sheet_item": "SHEET"})
+
+		# every rate comes from the prefetched context
+		with self.assertQueryCount(0):
+			doc.calculate_pricing(ctx)
+
+		# 120" * (0.5 + 0.3 + 0.2 + 0.25) + 40 * 2 + 2 * 2 + 45, * 1.05 flush, * 1.3 margin
+		self.assertAlmostEqual(doc.calculated_rate, (150 + 80 + 4 + 45) * 1.05 * 1.3)
+
+	def test_pricing_context_is_built_within_query_budget(self):
+		frappe.local.sign_pricing_context = None
+		frappe.get_cached_doc("Pricing Settings")  # cached across requests, so not part of the budget
+		with self.assertQueryCount(CONTEXT_QUERY_BUDGET):
+			ctx = get_pricing_context()
+
+		doc = frappe.new_doc("Sign Configuration")
+		doc.update(
+			{
+				"perimeter_inches": 120,
+				"led_count": 40,
+				"sheet_count": 2,
+				"lighting_type": "Face-lit",
+				"mounting_type": "Flush",
+			}
+		)
+		# the context is reused for the rest of the request and answers every rate itself
+		with self.assertQueryCount(0):
+			self.assertIs(get_pricing_context(), ctx)
+			doc.calculate_pricing(ctx)
+		self.assertGreater(doc.calculated_rate, 0)
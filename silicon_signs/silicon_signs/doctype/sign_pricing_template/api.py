@@ -1,77 +1,203 @@
+import hashlib
+import json
+
 import frappe
+from frappe.utils import flt
+
+from silicon_signs.metrics import span, timed
+from silicon_signs.silicon_signs.doctype.sign_pricing_template.rule_set import (
+    TEMPLATE_ATTRIBUTES_CACHE,
+    get_rule_set,
+    get_template_for_item,
+)
 
-def _round_to(x: float, step: float | None):
-    if not step or step == "None":
-        return float(x)
-    step = float(step)
-    return round(float(x) / step) * step
-
-def _matches(rule, val):
-    op = (rule.operator or "Equals").strip()
-    if op == "Is Set":
-        return val not in (None, "", 0)
-    if op == "Equals":
-        return (str(val) == str(rule.value))
-    if op == "Not Equals":
-        return (str(val) != str(rule.value))
-    if op == "Between":
-        try:
-            v = float(val or 0)
-            mn = float(rule.min_value if rule.min_value is not None else -1e30)
-            mx = float(rule.max_value if rule.max_value is not None else 1e30)
-            return mn <= v <= mx
-        except Exception:
-            return False
-    return False
+
+def _default_currency():
+    # Global Defaults mirrors its default_currency into the "currency" default, which frappe keeps in
+    # redis, so unlike get_single_value this needs no query once warm
+    return frappe.defaults.get_global_default("currency") or "USD"
 
 @frappe.whitelist()
 def price_item_by_attributes(item_template: str, attributes, profile_name: str | None = None, currency: str | None = None):
     """Compute price solely from Item Attributes."""
-    attrs = frappe.parse_json(attributes) if isinstance(attributes, str) else (attributes or {})
+    with timed("price_item_by_attributes"):
+        attrs = frappe.parse_json(attributes) if isinstance(attributes, str) else (attributes or {})
 
-    if profile_name:
-        profile = frappe.get_doc("Sign Pricing Template", profile_name)
-    else:
-        profile = frappe.get_all("Sign Pricing Template",
-                                 filters={"sign_template": item_template},
-                                 fields=["name"], limit=1)
-        if not profile:
-            frappe.throw(f"No Sign Pricing Template found for template {item_template}")
-        profile = frappe.get_doc("Sign Pricing Template", profile[0].name)
-
-    subtotal = float(profile.base_price or 0)
-    breakdown = []
-    # child table is `rules`
-    for r in profile.rules:
-        if not r.active:
-            continue
-        val = attrs.get(r.attribute)  # attribute keys are *Item Attribute* names
-        if not _matches(r, val):
+        # compiled rule sets live in redis and are dropped by Sign Pricing Template.on_update,
+        # so a warm cache prices without touching the database
+        with span("db_lookup"):
+            if not profile_name:
+                profile_name = get_template_for_item(item_template)
+                if not profile_name:
+                    frappe.throw(f"No Sign Pricing Template found for template {item_template}")
+            rule_set = get_rule_set(profile_name)
+            cur = currency or _default_currency()
+
+        with span("rule_evaluation"):
+            price, breakdown = rule_set.evaluate(attrs)
+        return {"price": price, "currency": cur, "breakdown": breakdown}
+
+@frappe.whitelist()
+def price_items_by_attributes(items, currency: str | None = None):
+    """Price many variants in one call.
+
+    `items` is a list of {"item_template", "attributes", "profile_name"?} dicts or
+    [item_template, attributes] pairs; results come back in the same order.
+    """
+    with timed("price_items_by_attributes"):
+        return _price_items(frappe.parse_json(items) if isinstance(items, str) else (items or []), currency)
+
+def _price_items(items, currency):
+    with span("db_lookup"):
+        cur = currency or _default_currency()
+
+    # group by template so each rule set is resolved once, then evaluate in a single pass
+    groups = {}
+    for idx, entry in enumerate(items):
+        if isinstance(entry, dict):
+            template, attrs, profile_name = entry.get("item_template"), entry.get("attributes"), entry.get("profile_name")
+        else:
+            template, attrs, profile_name = entry[0], entry[1], None
+        attrs = frappe.parse_json(attrs) if isinstance(attrs, str) else (attrs or {})
+        groups.setdefault((template, profile_name), []).append((idx, attrs))
+
+    results = [None] * len(items)
+    for (template, profile_name), entries in groups.items():
+        with span("db_lookup"):
+            profile_name = profile_name or get_template_for_item(template)
+            rule_set = get_rule_set(profile_name) if profile_name else None
+        if not rule_set:
+            for idx, _ in entries:
+                results[idx] = {"error": f"No Sign Pricing Template found for template {template}"}
             continue
 
-        mode = (r.mode or "Fixed").strip()
-        before = subtotal
+        with span("rule_evaluation"):
+            for idx, attrs in entries:
+                price, breakdown = rule_set.evaluate(attrs)
+                results[idx] = {"price": price, "currency": cur, "breakdown": breakdown}
+    return results
+
+@frappe.whitelist()
+def get_template_attributes(item_template: str, if_none_match: str | None = None):
+    """Attribute metadata for the Configure Sign dialog, served from a redis bundle per template.
+
+    The bundle carries an `etag`; a client that already holds it passes it back as `if_none_match`
+    and gets {"not_modified": 1} instead of the payload.
+    """
+    bundle = frappe.cache().hget(TEMPLATE_ATTRIBUTES_CACHE, item_template,
+                                 generator=lambda: build_template_attributes(item_template))
+    if if_none_match and if_none_match == bundle["etag"]:
+        return {"item_template": item_template, "etag": bundle["etag"], "not_modified": 1}
+    return bundle
+
+def build_template_attributes(item_template):
+    """Every attribute row of the template and its allowed values, in one query."""
+    iva = frappe.qb.DocType("Item Variant Attribute")
+    iav = frappe.qb.DocType("Item Attribute Value")
+    rows = (
+        frappe.qb.from_(iva)
+        .left_join(iav).on((iav.parent == iva.attribute) & (iav.parenttype == "Item Attribute"))
+        .select(iva.attribute, iva.numeric_values, iva.from_range, iva.to_range, iva.increment, iav.attribute_value)
+        .where(iva.parent == item_template)
+        .where(iva.parenttype == "Item")
+        .orderby(iva.idx)
+        .orderby(iav.idx)
+    ).run(as_dict=True)
+
+    attributes = {}
+    for r in rows:
+        attr = attributes.setdefault(r.attribute, {
+            "attribute": r.attribute,
+            "numeric_values": r.numeric_values,
+            "from_range": r.from_range,
+            "to_range": r.to_range,
+            "increment": r.increment,
+            "values": [],
+        })
+        if r.attribute_value is not None and not r.numeric_values:
+            attr["values"].append(r.attribute_value)
+
+    bundle = {
+        "item_template": item_template,
+        "pricing_template": get_template_for_item(item_template),
+        "attributes": list(attributes.values()),
+    }
+    bundle["etag"] = hashlib.sha1(json.dumps(bundle, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return bundle
+
+def clear_template_attributes_cache(item_template: str | None = None):
+    if item_template:
+        frappe.cache().hdel(TEMPLATE_ATTRIBUTES_CACHE, item_template)
+    else:
+        frappe.cache().delete_value(TEMPLATE_ATTRIBUTES_CACHE)
+
+def on_item_change(doc, method=None, old_name=None, *args):
+    # Item doc_events; after_rename passes the old name, whose bundle must go too
+    clear_template_attributes_cache(doc.name)
+    if old_name:
+        clear_template_attributes_cache(old_name)
+
+def on_item_attribute_change(doc, method=None, *args):
+    # an attribute's values or range can feed any number of templates
+    clear_template_attributes_cache()
+
+@frappe.whitelist(methods=["POST"])
+def configure_and_add_variant(quotation: str, item_template: str, attributes, qty: float = 1,
+                              profile_name: str | None = None):
+    """Price, find or create the variant, upsert its Item Price and append it to the Quotation.
+
+    Runs in the request transaction, so a failure at any step leaves nothing behind.
+    """
+    from erpnext.controllers.item_variant import create_variant, get_variant
+
+    with timed("configure_and_add_variant"):
+        attrs = frappe.parse_json(attributes) if isinstance(attributes, str) else (attributes or {})
+        doc = frappe.get_doc("Quotation", quotation)
+        doc.check_permission("write")
+        if doc.docstatus != 0:
+            frappe.throw("Only draft Quotations can be configured.")
 
-        if mode == "Fixed":
-            subtotal += float(r.amount or 0)
+        priced = price_item_by_attributes(item_template, attrs, profile_name=profile_name, currency=doc.currency)
+        price = priced["price"]
 
-        elif mode == "Percent":
-            subtotal += subtotal * (float(r.amount or 0) / 100.0)
+        item_code = get_variant(item_template, args=attrs)
+        if not item_code:
+            variant = create_variant(item_template, attrs)
+            variant.insert()
+            item_code = variant.name
+        uom = frappe.db.get_value("Item", item_code, "stock_uom") or "Nos"
 
-        elif mode == "Per Unit":
-            qty = 0.0
-            try:
-                qty = float(val or 0)
-            except Exception:
-                qty = 0.0
-            subtotal += qty * float(r.rate or 0)
+        price_list = doc.selling_price_list or "Standard Selling"
+        existing = frappe.db.get_value("Item Price", {"item_code": item_code, "price_list": price_list, "uom": uom,
+                                                      "customer": ["is", "not set"], "selling": 1}, "name")
+        if existing:
+            # through the document, so Item Price permissions and validation apply as on insert
+            item_price = frappe.get_doc("Item Price", existing)
+            item_price.check_permission("write")
+            if flt(item_price.price_list_rate) != flt(price):
+                item_price.price_list_rate = price
+                item_price.save()
+        else:
+            frappe.get_doc({
+                "doctype": "Item Price",
+                "item_code": item_code,
+                "price_list": price_list,
+                "price_list_rate": price,
+                "currency": doc.currency or priced["currency"],
+                "uom": uom,
+                "selling": 1,
+            }).insert()
 
-        # breakdown line
-        delta = subtotal - before
-        label = r.notes or f"{r.attribute} {mode}"
-        if abs(delta) > 1e-9:
-            breakdown.append(f"{label}: {delta:+.2f}")
+        # reuse a trailing empty row, as the dialog used to
+        row = doc.items[-1] if doc.items else None
+        if not row or row.item_code or row.item_name or row.description:
+            row = doc.append("items", {})
+        row.update({"item_code": item_code, "qty": flt(qty) or 1, "uom": uom})
+        doc.run_method("set_missing_values")
+        row.rate = price
+        doc.run_method("calculate_taxes_and_totals")
+        with span("save"):
+            doc.save()
 
-    rounded = _round_to(subtotal, profile.rounding)
-    cur = currency or frappe.db.get_single_value("Global Defaults", "default_currency") or "USD"
-    return {"price": float(rounded), "currency": cur, "breakdown": breakdown}
\ No newline at end of file
+        return {"item_code": item_code, "price": price, "currency": priced["currency"],
+                "breakdown": priced["breakdown"], "quotation": doc.name}
@@ -0,0 +1,349 @@
+import hashlib
+import itertools
+import json
+
+import frappe
+from frappe.utils import cint, flt, now, today
+
+from silicon_signs.silicon_signs.doctype.sign_pricing_template.rule_set import (
+	get_rule_set,
+	get_template_for_item,
+)
+
+CHUNK_SIZE = 500
+DEFAULT_NUMERIC_SAMPLES = 10
+PROGRESS_TTL = 7 * 24 * 3600
+
+
+def _progress_key(item_template, price_list):
+	return f"price_list_materialize:{item_template}:{price_list}"
+
+
+def _norm(value):
+	# variants store attribute values as text; compare numbers numerically so "18" == "18.0"
+	try:
+		return round(float(value), 6)
+	except (TypeError, ValueError):
+		return str(value)
+
+
+def _as_attribute_value(v):
+	return int(v) if float(v).is_integer() else v
+
+
+def _sample_range(lo, hi, step, samples):
+	if step <= 0 or hi < lo:
+		return [lo]
+	values = [lo + k * step for k in range(int((hi - lo) / step + 1e-9) + 1)]
+	if len(values) > samples > 1:
+		# evenly spaced subset that keeps both ends of the range
+		values = [values[round(k * (len(values) - 1) / (samples - 1))] for k in range(samples)]
+	return values
+
+
+def get_attribute_axes(item_template, numeric_samples=DEFAULT_NUMERIC_SAMPLES):
+	"""[(attribute, [values...])] in template order; numeric attributes are sampled over their range."""
+	rows = frappe.get_all(
+		"Item Variant Attribute",
+		filters={"parent": item_template, "parenttype": "Item"},
+		fields=["attribute", "numeric_values", "from_range", "to_range", "increment"],
+		order_by="idx asc",
+	)
+	listed = [r.attribute for r in rows if not r.numeric_values]
+	numeric = [r.attribute for r in rows if r.numeric_values]
+
+	values = {}
+	for v in frappe.get_all(
+		"Item Attribute Value",
+		filters={"parent": ["in", listed or [""]]},
+		fields=["parent", "attribute_value"],
+		order_by="idx asc",
+	):
+		values.setdefault(v.parent, []).append(v.attribute_value)
+	ranges = {
+		a.name: a
+		for a in frappe.get_all(
+			"Item Attribute",
+			filters={"name": ["in", numeric or [""]]},
+			fields=["name", "from_range", "to_range", "increment"],
+		)
+	}
+
+	axes = []
+	for r in rows:
+		if r.numeric_values:
+			# the template row may leave the range blank and inherit it from the Item Attribute
+			src = r if flt(r.increment) else ranges.get(r.attribute, r)
+			sampled = _sample_range(
+				flt(src.from_range), flt(src.to_range), flt(src.increment), numeric_samples
+			)
+			axes.append((r.attribute, [_as_attribute_value(v) for v in sampled]))
+		else:
+			axes.append((r.attribute, values.get(r.attribute, [])))
+	return axes
+
+
+def _axes_fingerprint(axes, profile_name):
+	"""Identifies the combination list (and the rules pricing it) that a checkpoint's offset indexes."""
+	modified = frappe.db.get_value("Sign Pricing Template", profile_name, "modified")
+	payload = json.dumps({"axes": axes, "template": [profile_name, modified]}, default=str)
+	return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def get_variant_map(item_template, attributes):
+	"""{normalised attribute tuple: variant item} for every variant of the template, in one query."""
+	item = frappe.qb.DocType("Item")
+	iva = frappe.qb.DocType("Item Variant Attribute")
+	rows = (
+		frappe.qb.from_(iva)
+		.join(item)
+		.on(iva.parent == item.name)
+		.select(
+			iva.parent, iva.attribute, iva.attribute_value, item.stock_uom, item.item_name, item.description
+		)
+		.where(item.variant_of == item_template)
+		.where(iva.parenttype == "Item")
+	).run(as_dict=True)
+
+	by_item = {}
+	for r in rows:
+		entry = by_item.setdefault(
+			r.parent,
+			{
+				"item_code": r.parent,
+				"uom": r.stock_uom,
+				"item_name": r.item_name,
+				"description": r.description,
+				"attrs": {},
+			},
+		)
+		entry["attrs"][r.attribute] = r.attribute_value
+	return {tuple(_norm(v["attrs"].get(a)) for a in attributes): v for v in by_item.values()}
+
+
+@frappe.whitelist()
+def materialize_price_list(
+	item_template: str,
+	price_list: str,
+	profile_name: str | None = None,
+	numeric_samples: int = DEFAULT_NUMERIC_SAMPLES,
+	create_missing: int = 0,
+	restart: int = 0,
+):
+	"""Queue a (resumable) refresh of Item Price rows for every attribute combination of a template."""
+	frappe.only_for(("System Manager", "Sales Manager", "Item Manager"))
+	key = _progress_key(item_template, price_list)
+	if cint(restart):
+		frappe.cache().delete_value(key)
+	frappe.enqueue(
+		"silicon_signs.silicon_signs.doctype.sign_pricing_template.price_list.run_materialize_price_list",
+		queue="long",
+		timeout=6 * 3600,
+		job_id=key,
+		deduplicate=True,
+		item_template=item_template,
+		price_list=price_list,
+		profile_name=profile_name,
+		numeric_samples=cint(numeric_samples) or DEFAULT_NUMERIC_SAMPLES,
+		create_missing=cint(create_missing),
+		user=frappe.session.user,
+	)
+	return get_price_list_progress(item_template, price_list)
+
+
+@frappe.whitelist()
+def get_price_list_progress(item_template: str, price_list: str):
+	return frappe.cache().get_value(_progress_key(item_template, price_list)) or {
+		"status": "queued",
+		"offset": 0,
+	}
+
+
+def run_materialize_price_list(
+	item_template,
+	price_list,
+	profile_name=None,
+	numeric_samples=DEFAULT_NUMERIC_SAMPLES,
+	create_missing=0,
+	user=None,
+):
+	key = _progress_key(item_template, price_list)
+	progress = frappe.cache().get_value(key) or {}
+	profile_name = profile_name or get_template_for_item(item_template)
+	if not profile_name:
+		frappe.throw(f"No Sign Pricing Template found for template {item_template}")
+	axes = get_attribute_axes(item_template, numeric_samples)
+	# the offset only means something for the combinations it was taken over: other inputs, or attribute
+	# values / template rows / pricing rules changed since, start again
+	inputs = {
+		"profile_name": profile_name,
+		"numeric_samples": cint(numeric_samples),
+		"combinations": _axes_fingerprint(axes, profile_name),
+	}
+	if progress.get("status") == "done" or progress.get("inputs") != inputs:
+		progress = {}
+	# combinations come from itertools.product in a fixed order, so an offset is enough to resume
+	progress = {
+		"offset": 0,
+		"updated": 0,
+		"inserted": 0,
+		"unchanged": 0,
+		"missing": 0,
+		**progress,
+		"inputs": inputs,
+		"status": "running",
+	}
+
+	rule_set = get_rule_set(profile_name)
+	attributes = [a for a, _ in axes]
+	progress["total"] = 1
+	for _, vals in axes:
+		progress["total"] *= len(vals)
+	variants = get_variant_map(item_template, attributes)
+	price_list_doc = frappe.db.get_value("Price List", price_list, ["currency", "selling", "buying"])
+	if not price_list_doc:
+		frappe.throw(f"Price List {price_list} not found")
+	currency, selling, buying = price_list_doc
+
+	combos = itertools.islice(itertools.product(*(vals for _, vals in axes)), progress["offset"], None)
+	while True:
+		chunk = list(itertools.islice(combos, CHUNK_SIZE))
+		if not chunk:
+			break
+		_write_chunk(
+			item_template,
+			price_list,
+			chunk,
+			attributes,
+			variants,
+			rule_set,
+			currency,
+			selling,
+			buying,
+			create_missing,
+			progress,
+		)
+		progress["offset"] += len(chunk)
+		# commit per chunk: keeps row locks short and makes the checkpoint below safe to resume from
+		frappe.db.commit()  # nosemgrep: background job, the checkpoint must not run ahead of the rows
+		frappe.cache().set_value(key, progress, expires_in_sec=PROGRESS_TTL)
+		frappe.publish_realtime("price_list_materialize_progress", {"key": key, **progress}, user=user)
+
+	progress["status"] = "done"
+	frappe.cache().set_value(key, progress, expires_in_sec=PROGRESS_TTL)
+	frappe.publish_realtime("price_list_materialize_progress", {"key": key, **progress}, user=user)
+	return progress
+
+
+def _write_chunk(
+	item_template,
+	price_list,
+	chunk,
+	attributes,
+	variants,
+	rule_set,
+	currency,
+	selling,
+	buying,
+	create_missing,
+	progress,
+):
+	priced = {}
+	for combo in chunk:
+		attrs = dict(zip(attributes, combo, strict=True))
+		variant = variants.get(tuple(_norm(v) for v in combo))
+		if not variant and create_missing:
+			from erpnext.controllers.item_variant import create_variant
+
+			doc = create_variant(item_template, attrs)
+			doc.insert(ignore_permissions=True)
+			variant = {
+				"item_code": doc.name,
+				"uom": doc.stock_uom,
+				"item_name": doc.item_name,
+				"description": doc.description,
+			}
+			variants[tuple(_norm(v) for v in combo)] = variant
+		if not variant:
+			progress["missing"] += 1
+			continue
+		priced[variant["item_code"]] = (variant, rule_set.evaluate(attrs)[0])
+	if not priced:
+		return
+
+	# only the generic price of each variant's stock uom is ours: party specific rows are left alone
+	existing = {}
+	for row in frappe.get_all(
+		"Item Price",
+		filters={
+			"price_list": price_list,
+			"item_code": ["in", list(priced)],
+			"customer": ["is", "not set"],
+			"supplier": ["is", "not set"],
+			"selling" if selling else "buying": 1,
+		},
+		fields=["name", "item_code", "uom", "price_list_rate"],
+	):
+		existing.setdefault((row.item_code, row.uom), row)
+
+	# bulk writes skip Item Price.validate, so the rows carry what it would have set: the price list's
+	# currency and selling/buying flags, the item's name and description, and valid_from (its default,
+	# "Today", is a form default bulk_insert doesn't apply). The item exists (it comes from the variant
+	# map) and no generic row for its uom does (looked up above), which is all validate checks here.
+	updates, inserts = {}, []
+	ts, user, valid_from = now(), frappe.session.user, today()
+	for item_code, (variant, price) in priced.items():
+		row = existing.get((item_code, variant["uom"]))
+		if row and abs(flt(row.price_list_rate) - price) < 1e-9:
+			progress["unchanged"] += 1
+		elif row:
+			updates[row.name] = {"price_list_rate": price}
+		else:
+			inserts.append(
+				(
+					frappe.generate_hash(length=10),
+					ts,
+					ts,
+					user,
+					user,
+					0,
+					item_code,
+					variant["item_name"],
+					variant.get("description"),
+					variant["uom"],
+					price_list,
+					price,
+					currency,
+					selling,
+					buying,
+					valid_from,
+				)
+			)
+
+	if updates:
+		frappe.db.bulk_update("Item Price", updates)
+		progress["updated"] += len(updates)
+	if inserts:
+		frappe.db.bulk_insert(
+			"Item Price",
+			[
+				"name",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+				"docstatus",
+				"item_code",
+				"item_name",
+				"item_description",
+				"uom",
+				"price_list",
+				"price_list_rate",
+				"currency",
+				"selling",
+				"buying",
+				"valid_from",
+			],
+			inserts,
+		)
+		progress["inserted"] += len(inserts)
@@ -0,0 +1,163 @@
+from bisect import bisect_right
+
+import frappe
+
+# rule sets are cached as pickled CompiledRuleSet objects, so the key carries a layout version: bump it
+# whenever CompiledRuleSet, CompiledRule or AttributeIndex change, and a deploy never loads old objects
+RULE_SET_VERSION = 2
+RULE_SET_CACHE = f"sign_pricing_rule_set:v{RULE_SET_VERSION}"
+TEMPLATE_FOR_ITEM_CACHE = "sign_pricing_template_for_item"
+TEMPLATE_ATTRIBUTES_CACHE = (
+	"sign_template_attributes"  # quote dialog bundles, see api.get_template_attributes
+)
+
+
+def _round_to(x: float, step: float | None):
+	if not step or step == "None":
+		return float(x)
+	step = float(step)
+	return round(float(x) / step) * step
+
+
+class CompiledRule:
+	"""One active Attribute Price Rule with operator, bounds, mode and amount parsed up front."""
+
+	__slots__ = ("amount", "attribute", "label", "max_value", "min_value", "mode", "op", "rate", "value")
+
+	def __init__(self, r):
+		self.attribute = r.attribute
+		self.op = (r.operator or "Equals").strip()
+		self.value = str(r.value)
+		self.min_value = float(r.min_value if r.min_value is not None else -1e30)
+		self.max_value = float(r.max_value if r.max_value is not None else 1e30)
+		self.mode = (r.mode or "Fixed").strip()
+		self.amount = float(r.amount or 0)
+		self.rate = float(r.rate or 0)
+		self.label = r.notes or f"{r.attribute} {self.mode}"
+
+	def apply(self, subtotal, val):
+		if self.mode == "Fixed":
+			return subtotal + self.amount
+		if self.mode == "Percent":
+			return subtotal + subtotal * (self.amount / 100.0)
+		if self.mode == "Per Unit":
+			try:
+				qty = float(val or 0)
+			except Exception:
+				qty = 0.0
+			return subtotal + qty * self.rate
+		return subtotal
+
+
+class AttributeIndex:
+	"""Rules on one attribute, bucketed by operator so only the ones that can match are visited.
+
+	Equals -> hash on the value, Between -> intervals sorted by lower bound, Not Equals and
+	Is Set -> plain lists. Entries are rule positions, so callers can restore template order.
+	"""
+
+	__slots__ = ("between", "between_mins", "equals", "is_set", "not_equals")
+
+	def __init__(self):
+		self.equals = {}
+		self.not_equals = []
+		self.is_set = []
+		self.between = []
+		self.between_mins = []
+
+	def add(self, pos, rule):
+		if rule.op == "Equals":
+			self.equals.setdefault(rule.value, []).append(pos)
+		elif rule.op == "Not Equals":
+			self.not_equals.append((rule.value, pos))
+		elif rule.op == "Is Set":
+			self.is_set.append(pos)
+		elif rule.op == "Between":
+			self.between.append((rule.min_value, rule.max_value, pos))
+
+	def freeze(self):
+		self.between.sort()
+		self.between_mins = [mn for mn, _, _ in self.between]
+
+	def collect(self, val, out):
+		s = str(val)
+		out.extend(self.equals.get(s, ()))
+		out.extend(pos for v, pos in self.not_equals if v != s)
+		if self.is_set and val not in (None, "", 0):
+			out.extend(self.is_set)
+		if self.between:
+			try:
+				v = float(val or 0)
+			except Exception:
+				return
+			upto = bisect_right(self.between_mins, v)
+			out.extend(pos for _, mx, pos in self.between[:upto] if v <= mx)
+
+
+class CompiledRuleSet:
+	"""A Sign Pricing Template reduced to plain values, cheap to cache and to evaluate."""
+
+	def __init__(self, profile):
+		self.name = profile.name
+		self.base_price = float(profile.base_price or 0)
+		self.rounding = profile.rounding
+		# rules whose operator or mode can never change the price are dropped here
+		self.rules = [
+			CompiledRule(r)
+			for r in profile.rules
+			if r.active
+			and (r.operator or "Equals").strip() in ("Equals", "Not Equals", "Between", "Is Set")
+			and (r.mode or "Fixed").strip() in ("Fixed", "Percent", "Per Unit")
+		]
+		self.index = {}
+		for pos, r in enumerate(self.rules):
+			self.index.setdefault(r.attribute, AttributeIndex()).add(pos, r)
+		for attr_index in self.index.values():
+			attr_index.freeze()
+
+	def evaluate(self, attrs):
+		# every indexed attribute is consulted, present or not: Not Equals / Between can match a missing value
+		matched = []
+		for attribute, attr_index in self.index.items():
+			attr_index.collect(attrs.get(attribute), matched)  # attribute keys are *Item Attribute* names
+		matched.sort()  # template order matters for Percent rules
+
+		subtotal = self.base_price
+		breakdown = []
+		for pos in matched:
+			r = self.rules[pos]
+			before = subtotal
+			subtotal = r.apply(subtotal, attrs.get(r.attribute))
+			delta = subtotal - before
+			if abs(delta) > 1e-9:
+				breakdown.append(f"{r.label}: {delta:+.2f}")
+		return float(_round_to(subtotal, self.rounding)), breakdown
+
+
+def get_rule_set(profile_name: str) -> CompiledRuleSet:
+	return frappe.cache().hget(
+		RULE_SET_CACHE,
+		profile_name,
+		generator=lambda: CompiledRuleSet(frappe.get_doc("Sign Pricing Template", profile_name)),
+	)
+
+
+def get_template_for_item(item_template: str) -> str | None:
+	def _lookup():
+		profile = frappe.get_all(
+			"Sign Pricing Template", filters={"sign_template": item_template}, fields=["name"], limit=1
+		)
+		return profile[0].name if profile else None
+
+	return frappe.cache().hget(TEMPLATE_FOR_ITEM_CACHE, item_template, generator=_lookup)
+
+
+def clear_rule_set_cache(profile_name: str | None = None):
+	"""Drop one template's compiled rules, or all of them (also the ``clear_cache`` hook)."""
+	if profile_name:
+		frappe.cache().hdel(RULE_SET_CACHE, profile_name)
+	else:
+		frappe.cache().delete_value(RULE_SET_CACHE)
+	# sign_template may have changed (or the template gone), so item -> template is rebuilt lazily,
+	# along with the dialog bundles that name the pricing template
+	frappe.cache().delete_value([TEMPLATE_FOR_ITEM_CACHE, TEMPLATE_ATTRIBUTES_CACHE])
@@ -1,8 +1,27 @@
 // Copyright (c) 2025, mohammedkashalo@gmail.com and contributors
 // For license information, please see license.txt
 
-// frappe.ui.form.on("Sign Pricing Template", {
-// 	refresh(frm) {
+frappe.ui.form.on("Sign Pricing Template", {
+	refresh(frm) {
+		if (frm.is_new() || !frm.doc.sign_template) return;
 
-// 	},
-// });
+		frm.add_custom_button(__("Refresh Price List"), () => {
+			frappe.prompt(
+				[
+					{ fieldname: "price_list", fieldtype: "Link", options: "Price List", label: __("Price List"), reqd: 1, default: "Standard Selling" },
+					{ fieldname: "numeric_samples", fieldtype: "Int", label: __("Samples per Numeric Attribute"), default: 10 },
+					{ fieldname: "create_missing", fieldtype: "Check", label: __("Create Missing Variants") },
+					{ fieldname: "restart", fieldtype: "Check", label: __("Restart From Scratch") },
+				],
+				(values) => {
+					frappe.call({
+						method: "silicon_signs.silicon_signs.doctype.sign_pricing_template.price_list.materialize_price_list",
+						args: { item_template: frm.doc.sign_template, profile_name: frm.doc.name, ...values },
+						callback: () => frappe.show_alert(__("Price list refresh queued")),
+					});
+				},
+				__("Refresh Price List")
+			);
+		});
+	},
+});
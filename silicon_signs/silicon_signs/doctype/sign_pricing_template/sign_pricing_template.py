@@ -4,6 +4,16 @@
 # import frappe
 from frappe.model.document import Document
 
+from silicon_signs.silicon_signs.doctype.sign_pricing_template.rule_set import clear_rule_set_cache
+
 
 class SignPricingTemplate(Document):
-	pass
+	def on_update(self):
+		clear_rule_set_cache(self.name)
+
+	def on_trash(self):
+		clear_rule_set_cache(self.name)
+
+	def after_rename(self, old, new, merge=False):
+		clear_rule_set_cache(old)
+		clear_rule_set_cache(new)
@@ -1,9 +1,204 @@
 # Copyright (c) 2025, mohammedkashalo@gmail.com and Contributors
 # See license.txt
 
-# import frappe
+import random
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from silicon_signs.silicon_signs.doctype.sign_pricing_template.api import (
+	clear_template_attributes_cache,
+	get_template_attributes,
+	price_item_by_attributes,
+)
+from silicon_signs.silicon_signs.doctype.sign_pricing_template.rule_set import CompiledRuleSet, _round_to
+from silicon_signs.tests.utils import BENCH_TEMPLATE_ITEM, random_attributes, synthetic_rules
+
+# queries allowed per warm price: the rule set and the default currency both come from redis
+PRICE_QUERY_BUDGET = 0
+
+
+def make_profile(rules, base_price=100, rounding="0.01"):
+	return frappe._dict(
+		name="_Test Pricing",
+		base_price=base_price,
+		rounding=rounding,
+		rules=[
+			frappe._dict(
+				{
+					"active": 1,
+					"value": None,
+					"min_value": None,
+					"max_value": None,
+					"amount": 0,
+					"rate": 0,
+					"notes": None,
+					**r,
+				}
+			)
+			for r in rules
+		],
+	)
+
+
+def linear_price(profile, attrs):
+	"""Unindexed reference: every rule checked in template order."""
+	subtotal = float(profile.base_price or 0)
+	for r in profile.rules:
+		val = attrs.get(r.attribute)
+		if not r.active:
+			continue
+		if r.operator == "Equals":
+			ok = str(val) == str(r.value)
+		elif r.operator == "Not Equals":
+			ok = str(val) != str(r.value)
+		elif r.operator == "Is Set":
+			ok = val not in (None, "", 0)
+		else:
+			try:
+				ok = float(r.min_value) <= float(val or 0) <= float(r.max_value)
+			except ValueError:
+				ok = False
+		if not ok:
+			continue
+		if r.mode == "Fixed":
+			subtotal += r.amount
+		elif r.mode == "Percent":
+			subtotal += subtotal * r.amount / 100.0
+		else:
+			try:
+				subtotal += float(val or 0) * r.rate
+			except ValueError:
+				pass
+	return _round_to(subtotal, profile.rounding)
+
 
 class TestSignPricingTemplate(FrappeTestCase):
-	pass
+	def test_rule_modes_apply_in_order(self):
+		profile = make_profile(
+			[
+				{
+					"attribute": "Lighting",
+					"operator": "Equals",
+					"value": "Face-lit",
+					"mode": "Fixed",
+					"amount": 50,
+				},
+				{"attribute": "Lighting", "operator": "Is Set", "mode": "Percent", "amount": 10},
+				{
+					"attribute": "Height",
+					"operator": "Between",
+					"min_value": 12,
+					"max_value": 24,
+					"mode": "Per Unit",
+					"rate": 2,
+				},
+			]
+		)
+		price, breakdown = CompiledRuleSet(profile).evaluate({"Lighting": "Face-lit", "Height": "18"})
+		# (100 + 50) * 1.10 + 18 * 2
+		self.assertAlmostEqual(price, 201.0)
+		self.assertEqual(len(breakdown), 3)
+
+	def test_inactive_and_unmatched_rules_are_ignored(self):
+		profile = make_profile(
+			[
+				{
+					"attribute": "Lighting",
+					"operator": "Equals",
+					"value": "Face-lit",
+					"mode": "Fixed",
+					"amount": 50,
+					"active": 0,
+				},
+				{
+					"attribute": "Lighting",
+					"operator": "Not Equals",
+					"value": "Face-lit",
+					"mode": "Fixed",
+					"amount": 5,
+				},
+				{
+					"attribute": "Height",
+					"operator": "Between",
+					"min_value": 12,
+					"max_value": 24,
+					"mode": "Fixed",
+					"amount": 7,
+				},
+			]
+		)
+		price, breakdown = CompiledRuleSet(profile).evaluate({"Lighting": "Face-lit", "Height": "abc"})
+		self.assertEqual(price, 100.0)
+		self.assertEqual(breakdown, [])
+
+	def test_indexed_lookup_matches_linear_scan(self):
+		rng = random.Random(7)
+		attributes = ["Lighting", "Height", "Depth", "Finish"]
+		values = ["A", "B", "C", "12", "18", ""]
+		rules = []
+		for _ in range(300):
+			low = rng.uniform(0, 30)
+			rules.append(
+				{
+					"attribute": rng.choice(attributes),
+					"operator": rng.choice(["Equals", "Not Equals", "Between", "Is Set"]),
+					"value": rng.choice(values),
+					"min_value": low,
+					"max_value": low + rng.uniform(0, 10),
+					"mode": rng.choice(["Fixed", "Percent", "Per Unit"]),
+					"amount": rng.uniform(-5, 5),
+					"rate": rng.uniform(0, 2),
+					"active": rng.random() > 0.1,
+				}
+			)
+		profile = make_profile(rules)
+		rule_set = CompiledRuleSet(profile)
+		for _ in range(200):
+			attrs = {a: rng.choice(values) for a in attributes if rng.random() > 0.2}
+			self.assertAlmostEqual(rule_set.evaluate(attrs)[0], linear_price(profile, attrs), places=6)
+
+	def test_warm_price_stays_within_query_budget(self):
+		rng = random.Random(11)
+		profile = frappe.get_doc(
+			{
+				"doctype": "Sign Pricing Template",
+				"sign_template": BENCH_TEMPLATE_ITEM,
+				"base_price": 250,
+				"rounding": "0.01",
+				"rules": synthetic_rules(500, rng),
+			}
+		).insert(ignore_links=True)
+
+		attrs = [random_attributes(rng) for _ in range(25)]
+		price_item_by_attributes(BENCH_TEMPLATE_ITEM, attrs[0])  # warm
+		with self.assertQueryCount(PRICE_QUERY_BUDGET * len(attrs)):
+			for a in attrs:
+				price_item_by_attributes(BENCH_TEMPLATE_ITEM, a)
+
+		profile.rules[0].amount += 1
+		profile.save()  # on_update must drop the compiled set, not serve a stale price
+		self.assertEqual(
+			price_item_by_attributes(BENCH_TEMPLATE_ITEM, attrs[0])["price"],
+			CompiledRuleSet(profile).evaluate(attrs[0])[0],
+		)
+
+	def test_template_attributes_bundle_is_cached_and_revalidated(self):
+		clear_template_attributes_cache()
+		first = get_template_attributes(BENCH_TEMPLATE_ITEM)
+		with self.assertQueryCount(0):
+			again = get_template_attributes(BENCH_TEMPLATE_ITEM, if_none_match=first["etag"])
+		self.assertTrue(again["not_modified"])
+
+		# a pricing template for the item changes the bundle, so the held etag must stop matching
+		profile = frappe.get_doc(
+			{
+				"doctype": "Sign Pricing Template",
+				"sign_template": BENCH_TEMPLATE_ITEM,
+				"base_price": 100,
+			}
+		).insert(ignore_links=True)
+		fresh = get_template_attributes(BENCH_TEMPLATE_ITEM, if_none_match=first["etag"])
+		self.assertFalse(fresh.get("not_modified"))
+		self.assertEqual(fresh["pricing_template"], profile.name)
+		self.assertNotEqual(fresh["etag"], first["etag"])
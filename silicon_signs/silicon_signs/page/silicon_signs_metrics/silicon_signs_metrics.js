@@ -0,0 +1,70 @@
+frappe.pages["silicon-signs-metrics"].on_page_load = function (wrapper) {
+	const page = frappe.ui.make_app_page({
+		parent: wrapper,
+		title: __("Silicon Signs Metrics"),
+		single_column: true,
+	});
+	const $body = $(`<div class="silicon-signs-metrics"></div>`).appendTo(page.main);
+
+	const fmt = (v) => (v == null ? "" : format_number(v, null, 2));
+
+	const render = (metrics) => {
+		const endpoints = Object.keys(metrics || {});
+		if (!endpoints.length) {
+			$body.html(`<p class="text-muted">${__("No samples recorded yet.")}</p>`);
+			return;
+		}
+		$body.html(
+			endpoints
+				.map((endpoint) => {
+					const spans = metrics[endpoint];
+					// total first, then the spans by how much time they take at p95
+					const names = Object.keys(spans)
+						.filter((name) => name !== "total" && name !== "error")
+						.sort((a, b) => (spans[b].p95 || 0) - (spans[a].p95 || 0));
+					const rows = ["total", ...names]
+						.filter((name) => spans[name])
+						.map((name) => {
+							const s = spans[name];
+							return `<tr>
+								<td>${frappe.utils.escape_html(name)}</td>
+								<td class="text-right">${s.count}</td>
+								<td class="text-right">${fmt(s.mean)}</td>
+								<td class="text-right">${fmt(s.p50)}</td>
+								<td class="text-right">${fmt(s.p95)}</td>
+								<td class="text-right">${fmt(s.p99)}</td>
+								<td class="text-right">${fmt(s.max)}</td>
+							</tr>`;
+						})
+						.join("");
+					const errors = spans.error ? spans.error.count : 0;
+					return `<h5 class="mt-4">${frappe.utils.escape_html(endpoint)}
+							<small class="text-muted">${__("{0} errors", [errors])}</small></h5>
+						<table class="table table-bordered table-sm">
+							<thead><tr>
+								<th>${__("Span")}</th>
+								<th class="text-right">${__("Samples")}</th>
+								<th class="text-right">${__("Mean (ms)")}</th>
+								<th class="text-right">p50</th>
+								<th class="text-right">p95</th>
+								<th class="text-right">p99</th>
+								<th class="text-right">${__("Max")}</th>
+							</tr></thead>
+							<tbody>${rows}</tbody>
+						</table>`;
+				})
+				.join("")
+		);
+	};
+
+	const refresh = () =>
+		frappe.call("silicon_signs.metrics.get_metrics").then((r) => render(r.message));
+
+	page.set_primary_action(__("Refresh"), refresh, "refresh");
+	page.set_secondary_action(__("Reset"), () =>
+		frappe.confirm(__("Discard all recorded samples?"), () =>
+			frappe.call({ method: "silicon_signs.metrics.reset_metrics", type: "POST" }).then(refresh)
+		)
+	);
+	refresh();
+};
@@ -0,0 +1,61 @@
+"""Perimeter engines measured against small synthetic PDFs."""
+
+import fitz  # PyMuPDF
+from frappe.tests.utils import FrappeTestCase
+
+from silicon_signs.api import DUPLICATE, ENGINES, _layer_color, _pack_and_measure, _page_drawings
+
+OUTLINE = [(10, 10), (110, 10), (110, 60), (10, 60)]  # 300 pt closed
+
+
+def rotated_page():
+	"""A landscape artboard saved rotated, its one 40 x 30 pt square outside the rotated page.rect."""
+	doc = fitz.open()
+	page = doc.new_page(width=200, height=100)
+	page.draw_rect(fitz.Rect(150, 10, 190, 40), color=(0, 0, 0))
+	page.set_cropbox(fitz.Rect(20, 0, 200, 90))
+	page.set_rotation(90)
+	return doc, page
+
+
+def layered_page():
+	"""The same outline on the "Faces" and "Returns" layers, plus a stacked copy on "Faces"."""
+	doc = fitz.open()
+	page = doc.new_page(width=200, height=100)
+	faces, returns = doc.add_ocg("Faces"), doc.add_ocg("Returns")
+	for oc in (faces, returns, faces):
+		page.draw_polyline(OUTLINE, color=(0, 0, 0), closePath=True, oc=oc)
+	return doc, page
+
+
+class TestPerimeterEngines(FrappeTestCase):
+	def test_only_visible_keeps_drawings_on_rotated_pages(self):
+		doc, page = rotated_page()
+		self.assertEqual(len(list(_page_drawings(page, only_visible=True))), 1)
+		for engine, measure in ENGINES.items():
+			with self.subTest(engine=engine):
+				self.assertAlmostEqual(measure(page, only_visible=True), 140.0, places=3)
+				length, packed = _pack_and_measure(page, engine, only_visible=True)
+				self.assertAlmostEqual(length, 140.0, places=3)
+				self.assertEqual(tuple(packed.page_rect), (0.0, 0.0, 180.0, 90.0))
+		doc.close()
+
+	def test_breakdown_dedupes_within_each_layer(self):
+		doc, page = layered_page()
+		expected = {
+			("Faces", "stroke #000000"): 300.0,
+			("Returns", "stroke #000000"): 300.0,
+			DUPLICATE: 300.0,
+		}
+		for engine, measure in ENGINES.items():
+			with self.subTest(engine=engine):
+				for groups in (
+					measure(page, group=_layer_color),
+					_pack_and_measure(page, engine, group=_layer_color)[0],
+				):
+					self.assertEqual(groups.keys(), expected.keys())
+					for key, points in expected.items():
+						self.assertAlmostEqual(groups[key], points, places=3)
+				# without the breakdown the page is one group and only the first outline counts
+				self.assertAlmostEqual(measure(page), 300.0, places=3)
+		doc.close()
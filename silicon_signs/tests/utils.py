@@ -0,0 +1,67 @@
+"""Builders shared by the test suites and the benchmarks: synthetic pricing templates and contexts."""
+
+from contextlib import contextmanager
+
+import frappe
+
+ATTRIBUTES = ("Lighting Type", "Mounting Type", "Letter Height", "Return Depth", "Face Color", "Finish")
+VALUES = ("Face-lit", "Reverse Halo", "Dual Lit", "Raceway", "Flush", "Red", "White", "12", "18", "24")
+BENCH_TEMPLATE_ITEM = "_Bench Sign Template"
+
+
+def synthetic_rules(n, rng):
+	rules = []
+	for _ in range(n):
+		low = rng.uniform(0, 48)
+		rules.append(
+			{
+				"attribute": rng.choice(ATTRIBUTES),
+				"operator": rng.choice(("Equals", "Equals", "Not Equals", "Between", "Is Set")),
+				"value": rng.choice(VALUES),
+				"min_value": low,
+				"max_value": low + rng.uniform(0, 12),
+				"mode": rng.choice(("Fixed", "Fixed", "Percent", "Per Unit")),
+				"amount": round(rng.uniform(-5, 25), 2),
+				"rate": round(rng.uniform(0, 3), 2),
+				"notes": None,
+				"active": 1,
+			}
+		)
+	return rules
+
+
+def synthetic_profile(n, rng, name="_Bench Pricing"):
+	return frappe._dict(
+		name=name, base_price=250, rounding="0.01", rules=[frappe._dict(r) for r in synthetic_rules(n, rng)]
+	)
+
+
+def random_attributes(rng):
+	return {a: rng.choice(VALUES) for a in ATTRIBUTES if rng.random() > 0.15}
+
+
+@contextmanager
+def count_queries():
+	"""Counts frappe.db.sql calls, the same hook FrappeTestCase.assertQueryCount uses."""
+	queries = []
+	db_class = frappe.db.__class__
+	orig_sql = db_class.sql
+
+	def _sql(self, *args, **kwargs):
+		queries.append(args[0] if args else kwargs.get("query"))
+		return orig_sql(self, *args, **kwargs)
+
+	db_class.sql = _sql
+	try:
+		yield queries
+	finally:
+		db_class.sql = orig_sql
+
+
+def fake_pricing_context(settings=None):
+	"""A PricingContext stand-in with fixed settings and rates, so calculate_pricing runs without a site."""
+	return frappe._dict(
+		settings=frappe._dict(settings or {}),
+		item_rate=lambda item_code: 2.0,
+		operation_rate=lambda operation: 30.0,
+	)